@@ -0,0 +1,100 @@
+# Checks that the catalogue list queries are answered from an index rather
+# than a sequential scan of products, and in page order rather than by
+# sorting every matching row. Exits non-zero if any query's plan scans the
+# table or sorts, except the price range shapes in RANGE_SORTS.
+#
+# Usage: python -m benchmarks.explain_indexes
+import sys
+import asyncio
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql, sqlite
+from database import engine
+from migrations import migrate
+from models.product import Product
+from pagination import keyset_paginate, encode_cursor
+from routes.products import product_query, filter_products
+from validators.product import FilteringRequest
+
+
+def sorted_query(sort_by: str, descending: bool, cursor_values=None):
+    cursor = encode_cursor(sort_by, cursor_values) if cursor_values else None
+    return keyset_paginate(
+        product_query(), sort_by, [getattr(Product, sort_by), Product.id], descending, cursor, 10
+    )
+
+
+def filtered_query(cursor_values=None, **filters):
+    cursor = encode_cursor("id", cursor_values) if cursor_values else None
+    return keyset_paginate(
+        filter_products(product_query(), FilteringRequest(**filters)), "id", [Product.id], False,
+        cursor, 10,
+    )
+
+
+QUERIES = {
+    "sorted by name": sorted_query("name", False),
+    "sorted by name desc, next page": sorted_query("name", True, ["M", 500]),
+    "sorted by price": sorted_query("price", False),
+    "sorted by price, next page": sorted_query("price", False, [20.0, 500]),
+    "filtered by category": filtered_query(category="T-Shirts"),
+    "filtered by category and active": filtered_query(category="T-Shirts", is_active=True),
+    "filtered by category and active, next page": filtered_query([500], category="T-Shirts", is_active=True),
+    "filtered by active": filtered_query(is_active=True),
+    "filtered by active, next page": filtered_query([500], is_active=True),
+    "filtered by price range": filtered_query(min_price=10.0, max_price=20.0),
+    "filtered by active and price": filtered_query(is_active=True, min_price=10.0),
+}
+
+# No index serves a price range in id order, so these sort the rows inside
+# the range; the equality filters above must never sort.
+RANGE_SORTS = {"filtered by price range", "filtered by active and price"}
+
+
+def uses_sequential_scan(dialect: str, plan: list):
+    if dialect == "sqlite":
+        return any(
+            line.startswith("SCAN products") and "USING" not in line for line in plan
+        )
+    return any("Seq Scan on products" in line for line in plan)
+
+
+def uses_sort(dialect: str, plan: list):
+    if dialect == "sqlite":
+        return any(line.startswith("USE TEMP B-TREE FOR") for line in plan)
+    return any(line.lstrip(" ->").startswith(("Sort", "Incremental Sort")) for line in plan)
+
+
+async def main():
+    await migrate(engine)
+    dialect = engine.dialect.name
+    compile_dialect = sqlite.dialect() if dialect == "sqlite" else postgresql.dialect()
+    failures = []
+    async with engine.connect() as connection:
+        if dialect == "postgresql":
+            # Small tables are always cheaper to scan; ask whether an index
+            # is usable at all.
+            await connection.execute(text("SET enable_seqscan = off"))
+        for name, query in QUERIES.items():
+            statement = str(
+                query.compile(dialect=compile_dialect, compile_kwargs={"literal_binds": True})
+            )
+            if dialect == "sqlite":
+                rows = await connection.execute(text(f"EXPLAIN QUERY PLAN {statement}"))
+                plan = [row[-1] for row in rows]
+            else:
+                rows = await connection.execute(text(f"EXPLAIN {statement}"))
+                plan = [row[0] for row in rows]
+            failed = uses_sequential_scan(dialect, plan) or (
+                name not in RANGE_SORTS and uses_sort(dialect, plan)
+            )
+            if failed:
+                failures.append(name)
+            print(f"{'FAIL' if failed else 'ok  '} {name}")
+            for line in plan:
+                print(f"       {line}")
+    await engine.dispose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,79 @@
+# Requests/sec on the health check with the security headers added by the
+# old @app.middleware("http") hook (BaseHTTPMiddleware) versus the pure ASGI
+# SecurityHeadersMiddleware, driven in-process through httpx.
+#
+# Usage: python -m benchmarks.security_headers [requests] [concurrency]
+import sys
+import asyncio
+from time import perf_counter
+from fastapi import FastAPI, status
+from fastapi.responses import JSONResponse
+from httpx import ASGITransport, AsyncClient
+from security_headers import SecurityHeadersMiddleware, CONTENT_SECURITY_POLICY
+
+
+async def health_check():
+    return JSONResponse(
+        content={"detail": "The server is working"}, status_code=status.HTTP_200_OK
+    )
+
+
+def build_app():
+    app = FastAPI()
+    app.add_api_route("/", health_check, status_code=status.HTTP_200_OK)
+    return app
+
+
+def base_http_app():
+    app = build_app()
+
+    @app.middleware("http")
+    async def add_security_headers(request, call_next):
+        response = await call_next(request)
+        response.headers["Strict-Transport-Security"] = (
+            "max-age=63072000; includeSubDomains"
+        )
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        response.headers["Content-Security-Policy"] = CONTENT_SECURITY_POLICY
+        return response
+
+    return app
+
+
+def pure_asgi_app():
+    app = build_app()
+    app.add_middleware(SecurityHeadersMiddleware)
+    return app
+
+
+async def measure(name: str, app, total: int, concurrency: int):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="https://testserver") as client:
+        response = await client.get("/")
+        assert response.headers.get("x-frame-options") == "DENY" or name == "no middleware"
+
+        async def worker(count: int):
+            for _ in range(count):
+                await client.get("/")
+
+        started = perf_counter()
+        await asyncio.gather(*(worker(total // concurrency) for _ in range(concurrency)))
+        elapsed = perf_counter() - started
+    done = total // concurrency * concurrency
+    print(f"{name:<22} {done / elapsed:9.0f} req/s {elapsed / done * 1e6:8.1f} us/request")
+
+
+async def main(total: int, concurrency: int):
+    for name, app in (
+        ("no middleware", build_app()),
+        ("BaseHTTPMiddleware", base_http_app()),
+        ("pure ASGI", pure_asgi_app()),
+    ):
+        await measure(name, app, total, concurrency)
+
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    asyncio.run(main(total, concurrency))
@@ -0,0 +1,77 @@
+# Per-item cost of building a product list response: ORM objects through
+# jsonable_encoder versus selected columns through the compiled row
+# serializer (plus orjson when installed).
+#
+# Usage: python -m benchmarks.serialization [products] [rounds]
+import sys
+from time import perf_counter
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from database import Base
+from models.category import Category
+from models.product import Product
+from routes.products import product_query, serialize_product_row
+from serialization import FastJSONResponse
+
+
+def seed(session: Session, total: int):
+    categories = [Category(name=f"Category {index}") for index in range(20)]
+    session.add_all(categories)
+    session.flush()
+    session.add_all(
+        Product(
+            name=f"Product {index}",
+            description="A comfortable cotton t-shirt with a printed logo.",
+            price=round(5 + (index % 200) * 0.5, 2),
+            size="M",
+            category_id=categories[index % len(categories)].id,
+            image_url=f"images/{index}.jpg",
+            is_active=index % 7 != 0,
+        )
+        for index in range(total)
+    )
+    session.commit()
+
+
+def orm_payload(session: Session):
+    products = session.scalars(select(Product)).all()
+    return JSONResponse(content={"products": jsonable_encoder(products)}).body
+
+
+def column_payload(session: Session):
+    products = [serialize_product_row(row) for row in session.execute(product_query())]
+    return FastJSONResponse(content={"products": products}).body
+
+
+def measure(name: str, build, session: Session, total: int, rounds: int):
+    timings = []
+    for _ in range(rounds):
+        session.expunge_all()
+        started = perf_counter()
+        body = build(session)
+        timings.append(perf_counter() - started)
+    best = min(timings)
+    print(
+        f"{name:<28} {best * 1000:8.1f} ms/response {best / total * 1e6:7.2f} us/item "
+        f"{len(body) / 1024:8.0f} KiB"
+    )
+    return best
+
+
+def main(total: int, rounds: int):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        seed(session, total)
+        print(f"{total} products, best of {rounds} rounds, response class {FastJSONResponse.__name__}")
+        orm = measure("ORM + jsonable_encoder", orm_payload, session, total, rounds)
+        columns = measure("columns + row serializer", column_payload, session, total, rounds)
+    print(f"speedup: {orm / columns:.1f}x")
+
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    main(total, rounds)
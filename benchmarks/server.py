@@ -0,0 +1,153 @@
+# Compares ways of launching the API: the previous `python main.py` launch
+# (uvicorn.run with reload=True, which silently runs a single worker under
+# the reloader), `python -m serve` on the stock asyncio/h11 stack and with
+# uvloop/httptools, and `python -m serve --preload`. For each launch it
+# reports the time to the first response, the memory of the whole process
+# tree (PSS, Linux only), a load-test scenario from benchmarks.load and how
+# long the server takes to exit after SIGTERM.
+#
+# Usage: python -m benchmarks.server [--workers N] [--duration S]
+#                                    [--concurrency N] [--scenario NAME]
+import os
+import sys
+import signal
+import socket
+import asyncio
+import subprocess
+from argparse import ArgumentParser, Namespace
+from time import perf_counter
+from httpx import AsyncClient, Limits
+
+PREVIOUS_LAUNCH = (
+    "import sys\n"
+    "from uvicorn import run\n"
+    "run('main:app', host='127.0.0.1', port=int(sys.argv[1]), workers=4, reload=True,\n"
+    "    log_level='warning', access_log=False)\n"
+)
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def launches(workers: int):
+    serve = [sys.executable, "-m", "serve", "--host", "127.0.0.1", "--workers", str(workers),
+             "--log-level", "warning", "--no-access-log"]
+    return [
+        ("previous (main.py)", lambda port: [sys.executable, "-c", PREVIOUS_LAUNCH, str(port)]),
+        ("serve asyncio/h11", lambda port: serve + ["--port", str(port), "--loop", "asyncio", "--http", "h11"]),
+        ("serve", lambda port: serve + ["--port", str(port)]),
+        ("serve --preload", lambda port: serve + ["--port", str(port), "--preload"]),
+    ]
+
+
+def process_tree(pid: int):
+    pids = [pid]
+    for current in pids:
+        try:
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as file:
+                    pids += [int(child) for child in file.read().split()]
+        except OSError:
+            pass
+    return pids
+
+
+def tree_pss_mib(pid: int):
+    """Proportional set size of ``pid`` and its descendants, so pages shared
+    copy-on-write between workers are only counted once overall."""
+    total = 0
+    for current in process_tree(pid):
+        try:
+            with open(f"/proc/{current}/smaps_rollup") as file:
+                for line in file:
+                    if line.startswith("Pss:"):
+                        total += int(line.split()[1])
+        except OSError:
+            return None
+    return total / 1024
+
+
+async def wait_for_first_response(base_url: str, process: subprocess.Popen, started: float, timeout: float = 60):
+    async with AsyncClient(base_url=base_url) as client:
+        while perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError("The server exited during startup")
+            try:
+                if (await client.get("/")).status_code == 200:
+                    return perf_counter() - started
+            except Exception:
+                pass
+            await asyncio.sleep(0.005)
+    raise RuntimeError("The server did not answer in time")
+
+
+async def measure(name: str, command, catalogue: dict, args):
+    from benchmarks.load import run_scenario
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = perf_counter()
+    process = subprocess.Popen(command(port), env={**os.environ}, start_new_session=True)
+    try:
+        first_response = await wait_for_first_response(base_url, process, started)
+        # Let the remaining workers finish booting before measuring.
+        await asyncio.sleep(args.settle)
+        memory = tree_pss_mib(process.pid)
+        async with AsyncClient(
+            base_url=base_url, timeout=60, limits=Limits(max_connections=args.concurrency)
+        ) as client:
+            result = await run_scenario(client, args.scenario, catalogue, args)
+        stopping = perf_counter()
+        process.send_signal(signal.SIGTERM)
+        await asyncio.to_thread(process.wait, 60)
+        shutdown = perf_counter() - stopping
+    finally:
+        if process.poll() is None:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+
+    memory = f"{memory:8.0f}" if memory is not None else f"{'n/a':>8}"
+    print(
+        f"{name:<20} {first_response * 1000:9.0f} {memory} {result['req_per_s']:8.0f} "
+        f"{result['p50_ms']:8.1f} {result['p99_ms']:8.1f} {result['errors']:6} {shutdown * 1000:9.0f}"
+    )
+
+
+async def main(args):
+    from benchmarks.load import seed
+
+    category_names = await seed(args.products, args.users, args.categories, args.seed)
+    catalogue = {"products": args.products, "users": args.users, "categories": category_names}
+    print(f"{args.workers} workers, {args.concurrency} virtual users, {args.duration:.0f}s of {args.scenario}")
+    print(
+        f"{'launch':<20} {'first ms':>9} {'PSS MiB':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} "
+        f"{'errors':>6} {'stop ms':>9}"
+    )
+    for name, command in launches(args.workers):
+        await measure(name, command, catalogue, args)
+
+
+def parse_args():
+    from benchmarks.load import DEFAULT_DATABASE_URL, SCENARIOS
+
+    parser = ArgumentParser(prog="python -m benchmarks.server", description="Compare server launch options.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--scenario", choices=list(SCENARIOS), default="anonymous_browsing")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL,
+                        help="database to seed and benchmark; it is wiped first")
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--duration", type=float, default=10, help="seconds of load per launch")
+    parser.add_argument("--concurrency", type=int, default=20, help="virtual users")
+    parser.add_argument("--settle", type=float, default=2, help="seconds to wait for all workers to boot")
+    return Namespace(**vars(parser.parse_args()), users=100, categories=20, seed=1)
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    # Same as benchmarks.load: settings are read at import time.
+    os.environ["SQLALCHEMY_DATABASE_URL"] = arguments.database_url
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    asyncio.run(main(arguments))
@@ -0,0 +1,63 @@
+# Load test for /products/all while another request runs a slow query.
+# With the async session the fast requests keep flowing; with a blocking
+# session they all queue up behind the slow one.
+#
+# Usage: python -m benchmarks.slow_query_load [requests] [slow_seconds]
+import sys
+import asyncio
+from time import perf_counter
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import text
+from fastapi import Request
+from main import app
+from database import db_dependency, engine
+from migrations import migrate
+from security import limiter
+
+CSRF = {"X-CSRF-Token": "bench"}
+SLOW_QUERY = text(
+    "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < :n) "
+    "SELECT count(*) FROM c"
+)
+
+
+@app.get("/_bench/slow", include_in_schema=False)
+async def slow_endpoint(request: Request, db: db_dependency):
+    await db.execute(SLOW_QUERY, {"n": int(request.query_params.get("n", 3_000_000))})
+    return {"detail": "done"}
+
+
+async def main(total_requests: int, slow_rows: int):
+    limiter.enabled = False
+    await migrate(engine)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(
+        transport=transport, base_url="https://bench", cookies={"csrf_token2": "bench"}
+    ) as client:
+        async def fast():
+            started = perf_counter()
+            await client.get("/products/all", headers=CSRF)
+            return perf_counter() - started
+
+        slow_started = perf_counter()
+        slow = asyncio.create_task(client.get(f"/_bench/slow?n={slow_rows}"))
+        await asyncio.sleep(0.01)
+        started = perf_counter()
+        latencies = await asyncio.gather(*(fast() for _ in range(total_requests)))
+        fast_elapsed = perf_counter() - started
+        await slow
+        slow_elapsed = perf_counter() - slow_started
+    await engine.dispose()
+
+    latencies.sort()
+    print(f"slow query:        {slow_elapsed:.3f}s")
+    print(f"fast requests:     {total_requests} in {fast_elapsed:.3f}s")
+    print(f"throughput:        {total_requests / fast_elapsed:.1f} req/s")
+    print(f"p50 / max latency: {latencies[len(latencies) // 2]:.4f}s / {latencies[-1]:.4f}s")
+
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 3_000_000
+    asyncio.run(main(total, rows))
@@ -0,0 +1,80 @@
+# Worker startup cost: time from spawning a uvicorn process serving main:app
+# to its first successful response on /, plus the bare `import main` time.
+# "eager master hash" reproduces the old startup, which ran an Argon2 hash
+# of MASTER_PASSWORD while importing security.py.
+#
+# Usage: python -m benchmarks.startup [runs]
+import os
+import sys
+import socket
+import subprocess
+from statistics import median
+from time import perf_counter, sleep
+from httpx import Client, HTTPError
+
+SERVE = (
+    "import sys\n"
+    "from uvicorn import run\n"
+    "{prelude}"
+    "run('main:app', host='127.0.0.1', port=int(sys.argv[1]), log_level='warning')\n"
+)
+EAGER_HASH = "from argon2 import PasswordHasher\nPasswordHasher().hash('master')\n"
+IMPORT_MAIN = (
+    "from time import perf_counter\n"
+    "started = perf_counter()\n"
+    "import main\n"
+    "print(perf_counter() - started)\n"
+)
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def time_to_first_response(code: str, env: dict, timeout: float = 30):
+    port = free_port()
+    started = perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", code, str(port)], env=env)
+    try:
+        with Client(base_url=f"http://127.0.0.1:{port}") as client:
+            while perf_counter() - started < timeout:
+                try:
+                    if client.get("/").status_code == 200:
+                        return perf_counter() - started
+                except HTTPError:
+                    pass
+                sleep(0.005)
+        raise RuntimeError("server did not answer in time")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def import_time(env: dict):
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_MAIN], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main(runs: int):
+    from argon2 import PasswordHasher
+
+    env = dict(os.environ)
+    env.pop("MASTER_PASSWORD_HASH", None)
+    hashed_env = {**env, "MASTER_PASSWORD_HASH": PasswordHasher().hash(env.get("MASTER_PASSWORD") or "master")}
+    variants = [
+        ("eager master hash", SERVE.format(prelude=EAGER_HASH), env),
+        ("lazy master hash", SERVE.format(prelude=""), env),
+        ("MASTER_PASSWORD_HASH", SERVE.format(prelude=""), hashed_env),
+    ]
+    print(f"import main: {median(import_time(hashed_env) for _ in range(runs)) * 1000:7.1f} ms (median of {runs})")
+    for name, code, variant_env in variants:
+        timings = [time_to_first_response(code, variant_env) for _ in range(runs)]
+        print(f"{name:<22} first response after {median(timings) * 1000:7.1f} ms (median of {runs})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,78 @@
+# CPU cost of authenticating /users/profile with and without the verified
+# token cache. The user cache is warm in both runs, so the difference is the
+# jwt.decode signature check the token cache skips.
+#
+# Usage: python -m benchmarks.token_cache [requests] [concurrency]
+import sys
+import asyncio
+from time import perf_counter, process_time
+from httpx import AsyncClient, ASGITransport
+from jose import jwt
+from main import app
+from database import engine
+from migrations import migrate
+from security import limiter
+from routes import auth
+
+CSRF = {"X-CSRF-Token": "bench"}
+EMAIL = "token-bench@example.com"
+PASSWORD = "bench-password"
+
+
+async def login(client: AsyncClient):
+    await client.post("/users/create", data={"email": EMAIL, "password": PASSWORD}, headers=CSRF)
+    response = await client.post("/login", data={"email": EMAIL, "password": PASSWORD}, headers=CSRF)
+    response.raise_for_status()
+    return response.cookies["access_token"]
+
+
+async def measure(name: str, client: AsyncClient, cookie: str, total: int, concurrency: int):
+    headers = {**CSRF, "Cookie": f"csrf_token2=bench; access_token={cookie}"}
+
+    async def worker(count: int):
+        for _ in range(count):
+            response = await client.get("/users/profile", headers=headers)
+            assert response.status_code == 200, response.text
+
+    await worker(10)
+    wall, cpu = perf_counter(), process_time()
+    await asyncio.gather(*(worker(total // concurrency) for _ in range(concurrency)))
+    wall, cpu = perf_counter() - wall, process_time() - cpu
+    done = total // concurrency * concurrency
+    print(f"{name:<20} {done / wall:8.0f} req/s {cpu / done * 1e6:8.1f} us CPU/request")
+
+
+def measure_decode(token: str, rounds: int = 20000):
+    started = process_time()
+    for _ in range(rounds):
+        jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
+    verify = (process_time() - started) / rounds
+    auth.decode_access_token(token)
+    started = process_time()
+    for _ in range(rounds):
+        auth.decode_access_token(token)
+    cached = (process_time() - started) / rounds
+    print(f"jwt.decode {verify * 1e6:.1f} us, cached lookup {cached * 1e6:.1f} us per token")
+
+
+async def main(total: int, concurrency: int):
+    limiter.enabled = False
+    await migrate(engine)
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="https://bench", cookies={"csrf_token2": "bench"}
+    ) as client:
+        token = await login(client)
+        client.cookies.clear()
+        token_cache = auth.token_cache
+        auth.token_cache = auth.TTLCache(maxsize=0, ttl=0)
+        await measure("token cache off", client, token, total, concurrency)
+        auth.token_cache = token_cache
+        await measure("token cache on", client, token, total, concurrency)
+    measure_decode(token)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    asyncio.run(main(total, concurrency))
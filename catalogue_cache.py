@@ -0,0 +1,187 @@
+from os import getenv
+from time import time
+from urllib.parse import urlencode
+from cache import TTLCache
+from response_compression import AVAILABLE_ENCODINGS
+
+CATALOGUE_CACHE_URL = getenv("CATALOGUE_CACHE_URL", "memory://")
+CATALOGUE_CACHE_SIZE = int(getenv("CATALOGUE_CACHE_SIZE", 1024))
+CATALOGUE_CACHE_TTL = int(getenv("CATALOGUE_CACHE_TTL", 30))
+
+LIST_GENERATION = "catalogue:generation:lists"
+DETAIL_GENERATION = "catalogue:generation:details"
+CATALOGUE_VERSION = "catalogue:version"
+CATALOGUE_MODIFIED = "catalogue:modified"
+
+
+class MemoryCacheBackend:
+    # Counters live in one worker, so a write handled by another worker
+    # never moves them. They can't back validators.
+    shared = False
+
+    def __init__(self, maxsize: int):
+        self.entries = TTLCache(maxsize=maxsize, ttl=CATALOGUE_CACHE_TTL)
+        self.counters = {}
+
+    async def get(self, key):
+        return self.entries.get(key)
+
+    async def set(self, key, value, ttl: int):
+        self.entries.set(key, value, ttl)
+
+    async def delete(self, key):
+        self.entries.delete(key)
+
+    async def counter(self, key):
+        return self.counters.get(key, 0)
+
+    async def incr(self, key):
+        self.counters[key] = self.counters.get(key, 0) + 1
+        return self.counters[key]
+
+    async def set_counter(self, key, value: int):
+        self.counters[key] = value
+
+    async def init_counter(self, key, value: int):
+        return self.counters.setdefault(key, value)
+
+
+class RedisCacheBackend:
+    shared = True
+
+    def __init__(self, url: str):
+        try:
+            from redis.asyncio import Redis
+        except ImportError:
+            raise RuntimeError(
+                "CATALOGUE_CACHE_URL points to Redis but the redis package is not installed"
+            )
+        self.client = Redis.from_url(url)
+
+    async def get(self, key):
+        return await self.client.get(key)
+
+    async def set(self, key, value, ttl: int):
+        await self.client.set(key, value, ex=ttl)
+
+    async def delete(self, key):
+        await self.client.delete(key)
+
+    async def counter(self, key):
+        return int(await self.client.get(key) or 0)
+
+    async def incr(self, key):
+        return await self.client.incr(key)
+
+    async def set_counter(self, key, value: int):
+        await self.client.set(key, value)
+
+    async def init_counter(self, key, value: int):
+        await self.client.set(key, value, nx=True)
+        return int(await self.client.get(key))
+
+
+def create_backend(url: str):
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCacheBackend(url)
+    if url.startswith("memory://"):
+        return MemoryCacheBackend(CATALOGUE_CACHE_SIZE)
+    raise RuntimeError(f"Unsupported CATALOGUE_CACHE_URL '{url}'")
+
+
+def item_generation_key(name: str, item_id: int):
+    return f"catalogue:generation:{name}:{item_id}"
+
+
+def normalize_params(params: dict):
+    items = sorted(
+        (name, getattr(value, "value", value))
+        for name, value in params.items()
+        if value is not None
+    )
+    return urlencode(items)
+
+
+class CatalogueCache:
+    """Read-through cache of rendered catalogue responses.
+
+    List entries embed a generation counter in their key, so any catalogue
+    write retires them all with a single increment. Detail entries embed
+    both the detail-wide generation and a per-item one, so a product write
+    retires only that product; category changes bump the detail-wide
+    generation because every product detail embeds its category name.
+    Since keys move on instead of being deleted, a read that loaded the row
+    before a write and stores it after the invalidation writes to a key no
+    one looks up any more, rather than bringing the stale body back.
+    Compressed variants of an entry live under the entry's key suffixed with
+    the content coding, so each body is compressed once per coding.
+    """
+
+    def __init__(self, backend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+
+    async def list_key(self, name: str, params: dict):
+        generation = await self.backend.counter(LIST_GENERATION)
+        return f"catalogue:list:{generation}:{name}:{normalize_params(params)}"
+
+    async def detail_key(self, name: str, item_id: int):
+        generation = await self.backend.counter(DETAIL_GENERATION)
+        item_generation = await self.backend.counter(item_generation_key(name, item_id))
+        return f"catalogue:detail:{generation}:{item_generation}:{name}:{item_id}"
+
+    async def get(self, key: str):
+        return await self.backend.get(key)
+
+    async def set(self, key: str, body: bytes):
+        await self.backend.set(key, body, self.ttl)
+
+    async def get_encoded(self, key: str, encoding: str):
+        return await self.backend.get(f"{key}:{encoding}")
+
+    async def set_encoded(self, key: str, encoding: str, body: bytes):
+        await self.backend.set(f"{key}:{encoding}", body, self.ttl)
+
+    async def delete(self, key: str):
+        await self.backend.delete(key)
+        for encoding in AVAILABLE_ENCODINGS:
+            await self.backend.delete(f"{key}:{encoding}")
+
+    async def version(self):
+        """Return the catalogue's ETag and last-modified Unix time.
+
+        Returns ``None`` when the backend is per worker: its version would
+        not move on writes handled by other workers, so clients could be
+        told their stale copy is current indefinitely.
+        """
+        if not self.backend.shared:
+            return None
+        number = await self.backend.counter(CATALOGUE_VERSION)
+        # Until the first write, every worker agrees on the time the first
+        # of them looked.
+        modified = await self.backend.counter(CATALOGUE_MODIFIED)
+        if not modified:
+            modified = await self.backend.init_counter(CATALOGUE_MODIFIED, int(time()))
+        return f'"{number}"', modified
+
+    async def bump_version(self):
+        await self.backend.incr(CATALOGUE_VERSION)
+        await self.backend.set_counter(CATALOGUE_MODIFIED, int(time()))
+
+    async def invalidate_lists(self):
+        await self.backend.incr(LIST_GENERATION)
+        await self.bump_version()
+
+    async def invalidate_product(self, product_id: int):
+        # Free the current entry now; the new generation keeps late writers
+        # of the old body out.
+        await self.delete(await self.detail_key("product", product_id))
+        await self.backend.incr(item_generation_key("product", product_id))
+        await self.invalidate_lists()
+
+    async def invalidate_all(self):
+        await self.backend.incr(DETAIL_GENERATION)
+        await self.invalidate_lists()
+
+
+catalogue_cache = CatalogueCache(create_backend(CATALOGUE_CACHE_URL), CATALOGUE_CACHE_TTL)
@@ -0,0 +1,49 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response, status
+from catalogue_cache import catalogue_cache
+
+
+def validator_headers(etag: str, last_modified: int):
+    return {
+        "ETag": etag,
+        "Last-Modified": format_datetime(
+            datetime.fromtimestamp(last_modified, timezone.utc), usegmt=True
+        ),
+        "Cache-Control": "no-cache",
+    }
+
+
+def request_is_fresh(request: Request, etag: str, last_modified: int):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified <= since.timestamp()
+    return False
+
+
+async def check_not_modified(request: Request):
+    """Compare the request's validators with the current catalogue version.
+
+    Returns ``(response, headers)``: ``response`` is a ready 304 when the
+    client's copy is current, otherwise ``None``; ``headers`` should be set on
+    the full response. Without a shared cache backend there are no reliable
+    validators, so no 304s are sent and ``headers`` is empty.
+    """
+    version = await catalogue_cache.version()
+    if version is None:
+        return None, {}
+    etag, last_modified = version
+    headers = validator_headers(etag, last_modified)
+    if request_is_fresh(request, etag, last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers), headers
+    return None, headers
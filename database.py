@@ -1,26 +1,138 @@
 import os
-from sqlalchemy import create_engine
+from time import perf_counter
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util.queue import AsyncAdaptedQueue
 from dotenv import load_dotenv
 from fastapi import Depends
 from typing import Annotated
+from instrumentation import instrument_engine
 
 load_dotenv()
 
-DATABASE_URL = os.getenv("SQLALCHEMY_DATABASE_URL")
-engine = create_engine(DATABASE_URL)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", -1))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() in ("1", "true", "yes")
+
+
+def to_async_url(url: str):
+    scheme, separator, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + separator + rest
+
+
+class TimedQueue(AsyncAdaptedQueue):
+    """Pool queue that records how long each get waits for a connection."""
+
+    stats = None
+
+    def get(self, block: bool = True, timeout: float = None):
+        started = perf_counter()
+        try:
+            return super().get(block, timeout)
+        finally:
+            waited = perf_counter() - started
+            self.stats["wait_seconds_total"] += waited
+            self.stats["wait_seconds_max"] = max(self.stats["wait_seconds_max"], waited)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait for a connection and
+    how often they spill into overflow or time out.
+
+    Only the wait on the queue is timed, not opening a new connection.
+    Checkouts are counted in connect() because QueuePool._do_get calls
+    itself again on the overflow path.
+    """
+
+    _queue_class = TimedQueue
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = {
+            "checkouts": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "overflow_events": 0,
+            "timeouts": 0,
+        }
+        self._pool.stats = self.stats
+
+    def connect(self):
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.stats["timeouts"] += 1
+            raise
+        self.stats["checkouts"] += 1
+        return connection
+
+    def _inc_overflow(self):
+        created = super()._inc_overflow()
+        if created and self._overflow > 0:
+            self.stats["overflow_events"] += 1
+        return created
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = pool._pool.stats = self.stats
+        return pool
+
+
+def create_engine_from_env(url: str):
+    if url.startswith("sqlite") and (":memory:" in url or url.endswith("://")):
+        return create_async_engine(url)
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+
+
+def pool_status():
+    pool = engine.sync_engine.pool
+    status = {"pid": os.getpid(), "pool_class": type(pool).__name__}
+    if isinstance(pool, InstrumentedQueuePool):
+        status.update(
+            {
+                "pool_size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                **pool.stats,
+            }
+        )
+    return status
+
+
+DATABASE_URL = to_async_url(os.getenv("SQLALCHEMY_DATABASE_URL"))
+engine = create_engine_from_env(DATABASE_URL)
+instrument_engine(engine)
+
+SessionLocal = async_sessionmaker(
+    bind=engine, autoflush=False, expire_on_commit=False, class_=AsyncSession
+)
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-db_dependency = Annotated[Session, Depends(get_db)]
+db_dependency = Annotated[AsyncSession, Depends(get_db)]
@@ -0,0 +1,188 @@
+from os import getenv, getpid
+from contextvars import ContextVar
+from time import perf_counter
+from dotenv import load_dotenv
+from sqlalchemy import event
+
+# prometheus_client picks its storage when it is imported: with
+# PROMETHEUS_MULTIPROC_DIR set, every worker writes its samples to files in
+# that directory and the scrape endpoint merges them.
+load_dotenv()
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    CONTENT_TYPE_LATEST,
+    generate_latest,
+    multiprocess,
+)
+
+PROMETHEUS_MULTIPROC_DIR = getenv("PROMETHEUS_MULTIPROC_DIR")
+
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last body chunk",
+    ["method", "route"],
+)
+REQUESTS = Counter(
+    "http_requests",
+    "Responses sent, by route template and status code",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests currently being handled",
+    multiprocess_mode="livesum",
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database queries executed while handling one request",
+    ["route"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent in database queries while handling one request",
+    ["route"],
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Duration of single database statements",
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "Time an Argon2 job spends on the hashing pool, excluding queueing",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0, 2.5),
+)
+PASSWORD_HASH_QUEUED = Gauge(
+    "password_hash_queued",
+    "Argon2 jobs waiting for a slot on the hashing pool",
+    multiprocess_mode="livesum",
+)
+SECURITY_REJECTIONS = Counter(
+    "security_rejections",
+    "Requests refused by rate limiting, CSRF validation or credential checks",
+    ["reason"],
+)
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "statements", "query_budget")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        # Only filled in while the SQL profiler is on.
+        self.statements = None
+        self.query_budget = None
+
+
+# Set for the duration of each HTTP request; SQLAlchemy runs statements in
+# the request's context, so the cursor hooks can attribute them to it.
+request_stats: ContextVar[RequestStats] = ContextVar("request_stats", default=None)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = perf_counter() - conn.info["query_started"].pop()
+    DB_QUERY_DURATION.observe(elapsed)
+    stats = request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        if stats.statements is not None:
+            stats.statements[statement] += 1
+
+
+def handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+def instrument_engine(engine):
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(sync_engine, "handle_error", handle_error)
+
+
+def route_template(scope):
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Record latency, status and database usage of every HTTP request.
+
+    Requests are labelled by route template (``/products/{product_id}``),
+    never by raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        stats = RequestStats()
+        token = request_stats.set(stats)
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc()
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = perf_counter() - started
+            REQUESTS_IN_PROGRESS.dec()
+            request_stats.reset(token)
+            route = route_template(scope)
+            REQUEST_DURATION.labels(scope["method"], route).observe(elapsed)
+            REQUESTS.labels(scope["method"], route, str(status_code)).inc()
+            REQUEST_DB_QUERIES.labels(route).observe(stats.queries)
+            REQUEST_DB_DURATION.labels(route).observe(stats.db_seconds)
+
+
+def observe_hash_job(operation: str, seconds: float):
+    PASSWORD_HASH_DURATION.labels(operation).observe(seconds)
+
+
+def set_hash_queue_depth(depth: int):
+    PASSWORD_HASH_QUEUED.set(depth)
+
+
+def record_rejection(reason: str):
+    SECURITY_REJECTIONS.labels(reason).inc()
+
+
+def render_metrics():
+    """Return the exposition body and its content type, merged across all
+    workers when PROMETHEUS_MULTIPROC_DIR is set."""
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_worker_stopped():
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(getpid())
@@ -1,11 +1,22 @@
 from os import getenv
-from uvicorn import run
+from asyncio import create_task, CancelledError
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI, status, Request
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
+from fastapi.exception_handlers import http_exception_handler
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from slowapi.errors import RateLimitExceeded
 from fastapi.middleware.cors import CORSMiddleware
-from routes import users, auth, products, category
-from database import Base, engine
+from routes import users, auth, products, category, metrics
+from database import engine
+from security import hash_executor, credentials_exception
+from routes.auth import csrf_exception
+from instrumentation import MetricsMiddleware, record_rejection, mark_worker_stopped
+from token_versions import STATELESS_TOKENS, token_versions
+from sql_profiler import QueryProfilerMiddleware, SQL_PROFILE_ENABLED
+from response_compression import CompressionMiddleware
+from security_headers import SecurityHeadersMiddleware
 
 # Don't forget to import the models
 from models.users import User
@@ -13,14 +24,34 @@ from models.product import Product
 from models.category import Category
 
 FRONTEND_URL = getenv("FRONTEND_URL")
-app = FastAPI()
-Base.metadata.create_all(bind=engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the token version map before serving, then keep it fresh in the
+    # background so stateless auth never queries the database in a request.
+    refresher = None
+    if STATELESS_TOKENS:
+        await token_versions.refresh()
+        refresher = create_task(token_versions.run())
+    yield
+    if refresher is not None:
+        refresher.cancel()
+        with suppress(CancelledError):
+            await refresher
+    await engine.dispose()
+    hash_executor.shutdown(wait=False, cancel_futures=True)
+    mark_worker_stopped()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(products.router)
 app.include_router(category.router)
 
 app.include_router(users.router)
 app.include_router(auth.router)
+app.include_router(metrics.router)
 
 origins = [
     FRONTEND_URL,
@@ -33,6 +64,11 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(SecurityHeadersMiddleware)
+if SQL_PROFILE_ENABLED:
+    app.add_middleware(QueryProfilerMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.exception_handler(RequestValidationError)
@@ -44,25 +80,15 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 
-@app.middleware("http")
-async def add_security_headers(request, call_next):
-    response = await call_next(request)
-
-    response.headers["Strict-Transport-Security"] = (
-        "max-age=63072000; includeSubDomains"
-    )
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    response.headers["Content-Security-Policy"] = (
-        "default-src 'self'; "
-        "script-src 'self' https://cdn.jsdelivr.net/npm/swagger-ui-dist@5/swagger-ui-bundle.js 'sha256-QOOQu4W1oxGqd2nbXbxiA1Di6OHQOLQD+o+G9oWL8YY='; "
-        "style-src 'self' https://cdn.jsdelivr.net/npm/swagger-ui-dist@5/swagger-ui.css; "
-        "img-src 'self' https://fastapi.tiangolo.com data:; http://www.w3.org/2000/svg;"
-        "frame-ancestors 'none'"
-    )
-
-    return response
+@app.exception_handler(StarletteHTTPException)
+async def count_security_rejections(request: Request, exc: StarletteHTTPException):
+    if isinstance(exc, RateLimitExceeded):
+        record_rejection("rate_limit")
+    elif exc is credentials_exception:
+        record_rejection("credentials")
+    elif exc is csrf_exception:
+        record_rejection("csrf")
+    return await http_exception_handler(request, exc)
 
 
 @app.get("/", status_code=status.HTTP_200_OK)
@@ -73,6 +99,6 @@ async def health_check():
 
 
 if __name__ == "__main__":
-    run(
-        "main:app", host="0.0.0.0", port=8000, workers=4, reload=True
-    )  # remove reload when finished with testing
+    from serve import main
+
+    main()
@@ -0,0 +1,50 @@
+# Schema as it was created by Base.metadata.create_all before migrations
+# existed. Tables are created with checkfirst so databases from that era
+# are adopted without changes.
+from sqlalchemy import MetaData, Table, Column, Integer, String, Float, Boolean, ForeignKey
+
+metadata = MetaData()
+
+Table(
+    "users",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String(64), unique=True, index=True),
+    Column("password", String(64)),
+    Column("is_admin", Boolean, default=False),
+)
+
+Table(
+    "user_profiles",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), unique=True),
+    Column("phone_number", String(20), nullable=True),
+    Column("address", String(200), nullable=True),
+    Column("city", String(50), nullable=True),
+    Column("postal_code", String(20), nullable=True),
+)
+
+Table(
+    "categories",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, nullable=False, unique=True),
+)
+
+Table(
+    "products",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, nullable=False),
+    Column("description", String),
+    Column("price", Float, nullable=False),
+    Column("size", String, nullable=True),
+    Column("category_id", Integer, ForeignKey("categories.id")),
+    Column("image_url", String),
+    Column("is_active", Boolean, default=True),
+)
+
+
+def upgrade(connection):
+    metadata.create_all(connection, checkfirst=True)
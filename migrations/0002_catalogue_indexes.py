@@ -0,0 +1,15 @@
+# Indexes for the product list shapes: keyset pages ordered by (name, id)
+# and (price, id), and the filters on category, availability and price.
+from sqlalchemy import text
+
+INDEXES = {
+    "ix_products_name_id": "products (name, id)",
+    "ix_products_price_id": "products (price, id)",
+    "ix_products_category_active_price": "products (category_id, is_active, price)",
+    "ix_products_active_price": "products (is_active, price)",
+}
+
+
+def upgrade(connection):
+    for name, definition in INDEXES.items():
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}"))
@@ -0,0 +1,16 @@
+# Per-user token versions for the stateless token mode.
+from sqlalchemy import MetaData, Table, Column, Integer, Float
+
+metadata = MetaData()
+
+Table(
+    "token_revocations",
+    metadata,
+    Column("user_id", Integer, primary_key=True),
+    Column("token_version", Integer, nullable=False),
+    Column("revoked_at", Float, nullable=False, index=True),
+)
+
+
+def upgrade(connection):
+    metadata.create_all(connection, checkfirst=True)
@@ -0,0 +1,16 @@
+# Filtered product pages are keyset-ordered by id, so the equality filters
+# need indexes that end in id: the matching rows then come out already in
+# page order and a deep page reads only its own rows instead of sorting
+# every match.
+from sqlalchemy import text
+
+INDEXES = {
+    "ix_products_category_active_id": "products (category_id, is_active, id)",
+    "ix_products_category_id": "products (category_id, id)",
+    "ix_products_active_id": "products (is_active, id)",
+}
+
+
+def upgrade(connection):
+    for name, definition in INDEXES.items():
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}"))
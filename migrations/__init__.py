@@ -0,0 +1,47 @@
+from importlib import import_module
+from pkgutil import iter_modules
+from datetime import datetime, timezone
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime, select, insert
+
+migration_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(100), nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+def load_migrations():
+    migrations = []
+    for module_info in iter_modules(__path__):
+        version, _, name = module_info.name.partition("_")
+        if not version.isdigit():
+            continue
+        module = import_module(f"{__name__}.{module_info.name}")
+        migrations.append((int(version), name, module))
+    return sorted(migrations, key=lambda migration: migration[0])
+
+
+def apply_migrations(connection):
+    migration_metadata.create_all(connection, checkfirst=True)
+    applied = set(connection.scalars(select(schema_migrations.c.version)))
+    newly_applied = []
+    for version, name, module in load_migrations():
+        if version in applied:
+            continue
+        module.upgrade(connection)
+        connection.execute(
+            insert(schema_migrations).values(
+                version=version, name=name, applied_at=datetime.now(timezone.utc)
+            )
+        )
+        newly_applied.append(f"{version:04d}_{name}")
+    return newly_applied
+
+
+async def migrate(engine):
+    async with engine.begin() as connection:
+        return await connection.run_sync(apply_migrations)
@@ -0,0 +1,17 @@
+from asyncio import run
+from database import engine
+from migrations import migrate
+
+
+async def main():
+    applied = await migrate(engine)
+    await engine.dispose()
+    if applied:
+        for migration in applied:
+            print(f"Applied {migration}")
+    else:
+        print("Database is up to date")
+
+
+if __name__ == "__main__":
+    run(main())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Float, Boolean, ForeignKey
+from sqlalchemy import Column, String, Integer, Float, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -16,3 +16,15 @@ class Product(Base):
     image_url = Column(String)
     is_active = Column(Boolean, default=True)
 
+    # Created by migrations/0002_catalogue_indexes.py and
+    # migrations/0005_filter_id_indexes.py
+    __table_args__ = (
+        Index("ix_products_name_id", "name", "id"),
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_category_active_price", "category_id", "is_active", "price"),
+        Index("ix_products_active_price", "is_active", "price"),
+        Index("ix_products_category_active_id", "category_id", "is_active", "id"),
+        Index("ix_products_category_id", "category_id", "id"),
+        Index("ix_products_active_id", "is_active", "id"),
+    )
+
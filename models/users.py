@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -38,3 +38,14 @@ class UserProfile(Base):
             "city": self.city,
             "postal_code": self.postal_code,
         }
+
+
+class TokenRevocation(Base):
+    """Latest token version per user; tokens carrying an older version are
+    rejected. Rows outlive their user so tokens of deleted accounts stay
+    revoked even if the id is reused."""
+
+    __tablename__ = "token_revocations"
+    user_id = Column(Integer, primary_key=True)
+    token_version = Column(Integer, nullable=False)
+    revoked_at = Column(Float, nullable=False, index=True)
@@ -0,0 +1,78 @@
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from json import dumps, loads
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+invalid_cursor_exception = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+)
+
+
+def encode_cursor(key: str, values: list):
+    payload = dumps({"k": key, "v": values}, separators=(",", ":")).encode()
+    return urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(key: str, cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = loads(urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise invalid_cursor_exception
+    if not isinstance(payload, dict) or payload.get("k") != key:
+        raise invalid_cursor_exception
+    values = payload.get("v")
+    if not isinstance(values, list):
+        raise invalid_cursor_exception
+    return values
+
+
+SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def cursor_value_matches(column, value):
+    """Whether ``value`` from a decoded cursor can be compared with ``column``.
+
+    Cursors come from clients, so anything but a scalar of the column's
+    type (any scalar for untyped expressions) is rejected before it reaches
+    SQL.
+    """
+    try:
+        expected = column.type.python_type
+    except (AttributeError, NotImplementedError):
+        return isinstance(value, SCALAR_TYPES)
+    if isinstance(value, bool) and expected is not bool:
+        return False
+    if expected is float:
+        return isinstance(value, (int, float))
+    return isinstance(value, expected)
+
+
+def keyset_paginate(query, key: str, columns: list, descending: bool, cursor, limit: int):
+    """Apply a keyset page to ``query`` ordered by ``columns``.
+
+    ``columns`` must end with a unique column (the primary key) so that the
+    ordering is total. Returns the paged query; pass the fetched items to
+    ``next_page_cursor`` to build the cursor for the following page.
+    """
+    if cursor is not None:
+        values = decode_cursor(key, cursor)
+        if len(values) != len(columns) or not all(
+            cursor_value_matches(column, value) for column, value in zip(columns, values)
+        ):
+            raise invalid_cursor_exception
+        if len(columns) == 1:
+            position, boundary = columns[0], values[0]
+        else:
+            position, boundary = tuple_(*columns), tuple_(*values)
+        query = query.where(position < boundary if descending else position > boundary)
+    order = [column.desc() if descending else column.asc() for column in columns]
+    return query.order_by(*order).limit(limit + 1)
+
+
+def next_page_cursor(items: list, key: str, fields: list, limit: int):
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    last = items[-1]
+    return items, encode_cursor(key, [last[field] for field in fields])
@@ -0,0 +1,162 @@
+import sqlite3
+from os import getpid
+from math import floor
+from threading import Lock
+from time import time
+from limits.storage import Storage
+from limits.storage.base import SlidingWindowCounterSupport, TimestampedSlidingWindow
+
+PURGE_EVERY = 256
+PURGE_BATCH = 512
+
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """Rate limit counters in a local SQLite file shared by every worker
+    process on the host.
+
+    Uses the same URL form as SQLAlchemy: ``sqlite:///relative.db`` or
+    ``sqlite:////absolute/path.db``. Expired counters are purged in batches
+    of at most PURGE_BATCH rows every PURGE_EVERY writes, so cleanup never
+    stalls a request for long.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.path = uri.split("://", 1)[1][1:]
+        self.lock = Lock()
+        self.connection = None
+        self.connection_pid = None
+        self.writes = 0
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def connect(self):
+        if self.connection is None or self.connection_pid != getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits "
+                "(key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS ix_rate_limits_expires_at ON rate_limits (expires_at)"
+            )
+            self.connection = connection
+            self.connection_pid = getpid()
+        return self.connection
+
+    def read_counter(self, connection, key: str, now: float):
+        row = connection.execute(
+            "SELECT value FROM rate_limits WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def write_counter(self, connection, key: str, expiry: float, elastic_expiry: bool, amount: int, now: float):
+        row = connection.execute(
+            "INSERT INTO rate_limits (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            "value = CASE WHEN expires_at <= ? THEN excluded.value ELSE value + excluded.value END, "
+            "expires_at = CASE WHEN expires_at <= ? OR ? THEN excluded.expires_at ELSE expires_at END "
+            "RETURNING value",
+            (key, amount, now + expiry, now, now, elastic_expiry),
+        ).fetchone()
+        self.writes += 1
+        if self.writes % PURGE_EVERY == 0:
+            connection.execute(
+                "DELETE FROM rate_limits WHERE rowid IN "
+                "(SELECT rowid FROM rate_limits WHERE expires_at <= ? LIMIT ?)",
+                (now, PURGE_BATCH),
+            )
+        return row[0]
+
+    def incr(self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1):
+        with self.lock:
+            connection = self.connect()
+            with connection:
+                return self.write_counter(connection, key, expiry, elastic_expiry, amount, time())
+
+    def decr(self, key: str, amount: int = 1):
+        with self.lock:
+            connection = self.connect()
+            with connection:
+                connection.execute(
+                    "UPDATE rate_limits SET value = MAX(value - ?, 0) WHERE key = ?",
+                    (amount, key),
+                )
+
+    def get(self, key: str):
+        with self.lock:
+            return self.read_counter(self.connect(), key, time())
+
+    def get_expiry(self, key: str):
+        with self.lock:
+            row = self.connect().execute(
+                "SELECT expires_at FROM rate_limits WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else time()
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1):
+        if amount > limit:
+            return False
+        with self.lock:
+            connection = self.connect()
+            # BEGIN IMMEDIATE takes the write lock up front, so reading both
+            # windows and incrementing is atomic across processes.
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                now = time()
+                previous_count, previous_ttl, current_count, _ = self.read_sliding_window(
+                    connection, key, expiry, now
+                )
+                weighted_count = previous_count * previous_ttl / expiry + current_count
+                acquired = floor(weighted_count) + amount <= limit
+                if acquired:
+                    current_key = self.sliding_window_keys(key, expiry, now)[1]
+                    self.write_counter(connection, current_key, 2 * expiry, False, amount, now)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        return acquired
+
+    def read_sliding_window(self, connection, key: str, expiry: int, now: float):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count = self.read_counter(connection, previous_key, now)
+        current_count = self.read_counter(connection, current_key, now)
+        if previous_count == 0:
+            previous_ttl = 0.0
+        else:
+            previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def get_sliding_window(self, key: str, expiry: int):
+        with self.lock:
+            return self.read_sliding_window(self.connect(), key, expiry, time())
+
+    def check(self):
+        try:
+            with self.lock:
+                self.connect().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        with self.lock:
+            connection = self.connect()
+            with connection:
+                return connection.execute("DELETE FROM rate_limits").rowcount
+
+    def clear(self, key: str):
+        with self.lock:
+            connection = self.connect()
+            with connection:
+                connection.execute("DELETE FROM rate_limits WHERE key = ?", (key,))
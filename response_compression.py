@@ -0,0 +1,203 @@
+from os import getenv
+from zlib import compressobj, DEFLATED, MAX_WBITS, Z_FINISH
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+# brotli and zstandard are optional; gzip is always offered.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_MIN_SIZE = int(getenv("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_GZIP_LEVEL = int(getenv("COMPRESSION_GZIP_LEVEL", 6))
+COMPRESSION_BROTLI_LEVEL = int(getenv("COMPRESSION_BROTLI_LEVEL", 5))
+COMPRESSION_ZSTD_LEVEL = int(getenv("COMPRESSION_ZSTD_LEVEL", 3))
+
+# Bodies at least this large are compressed off the event loop; all three
+# codecs release the GIL while they work.
+THREADPOOL_MIN_SIZE = 64 * 1024
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+class GzipEncoder:
+    def __init__(self):
+        self.compressor = compressobj(COMPRESSION_GZIP_LEVEL, DEFLATED, MAX_WBITS | 16)
+
+    def compress(self, data: bytes):
+        return self.compressor.compress(data)
+
+    def finish(self):
+        return self.compressor.flush(Z_FINISH)
+
+
+class BrotliEncoder:
+    def __init__(self):
+        self.compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_LEVEL)
+
+    def compress(self, data: bytes):
+        return self.compressor.process(data)
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+class ZstdEncoder:
+    def __init__(self):
+        self.compressor = zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes):
+        return self.compressor.compress(data)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+# In order of preference when the client rates several encodings equally.
+ENCODERS = {"gzip": GzipEncoder}
+if brotli is not None:
+    ENCODERS = {"br": BrotliEncoder, **ENCODERS}
+if zstandard is not None:
+    ENCODERS = {"zstd": ZstdEncoder, **ENCODERS}
+
+AVAILABLE_ENCODINGS = tuple(ENCODERS)
+
+
+def negotiate_encoding(accept_encoding: str):
+    """Pick the best available encoding from an Accept-Encoding header, or
+    ``None`` when the client accepts none of them."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+    wildcard = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for encoding in AVAILABLE_ENCODINGS:
+        weight = weights.get(encoding, wildcard)
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress_body(body: bytes, encoding: str):
+    encoder = ENCODERS[encoding]()
+    return encoder.compress(body) + encoder.finish()
+
+
+async def compress_body_async(body: bytes, encoding: str):
+    if len(body) >= THREADPOOL_MIN_SIZE:
+        return await run_in_threadpool(compress_body, body, encoding)
+    return compress_body(body, encoding)
+
+
+def is_compressible(headers: Headers):
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "")
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def set_encoded_headers(headers: MutableHeaders, encoding: str, length: int = None):
+    headers["Content-Encoding"] = encoding
+    headers.add_vary_header("Accept-Encoding")
+    if length is None:
+        if "content-length" in headers:
+            del headers["Content-Length"]
+    else:
+        headers["Content-Length"] = str(length)
+    # The encoded bytes differ from the identity ones, so a strong validator
+    # would no longer be byte-exact.
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = "W/" + etag
+
+
+class CompressionMiddleware:
+    """Compress response bodies with the best encoding the client accepts.
+
+    Bodies smaller than ``COMPRESSION_MIN_SIZE`` and responses that already
+    carry a Content-Encoding (such as precompressed catalogue cache hits)
+    are passed through untouched. Streaming responses are compressed chunk
+    by chunk.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        encoder = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, encoder, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                if not is_compressible(Headers(raw=message["headers"])):
+                    passthrough = True
+                    await send(start_message)
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                if not more_body:
+                    if len(body) < self.minimum_size:
+                        passthrough = True
+                        await send(start_message)
+                        await send(message)
+                        return
+                    body = await compress_body_async(body, encoding)
+                    set_encoded_headers(MutableHeaders(raw=start_message["headers"]), encoding, len(body))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                encoder = ENCODERS[encoding]()
+                set_encoded_headers(MutableHeaders(raw=start_message["headers"]), encoding)
+                await send(start_message)
+
+            chunk = encoder.compress(body)
+            if not more_body:
+                chunk += encoder.finish()
+            if chunk or not more_body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,14 +1,20 @@
 from os import getenv
 from secrets import token_urlsafe
+from hashlib import sha256
+from time import time
 from datetime import timedelta, datetime, timezone
 from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, status, Cookie, Request
 from fastapi.responses import JSONResponse
 from jose import jwt, JWTError
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
 from models.users import User
 from security import check_password, credentials_exception, limiter
 from database import db_dependency
+from cache import TTLCache
 from validators.users import login_or_create_or_update_user_dependency
+from token_versions import STATELESS_TOKENS, token_versions, token_claims, revoke_tokens, record_revocation
 
 router = APIRouter()
 
@@ -17,35 +23,134 @@ ALGORITHM = getenv("ALGORITHM")
 COOKIE_MAX_AGE = int(getenv("COOKIE_MAX_AGE"))
 COOKIE_DELTA = int(getenv("COOKIE_DELTA"))
 CSRF_TOKEN_SIZE = int(getenv("CSRF_TOKEN_SIZE"))
+USER_CACHE_SIZE = int(getenv("USER_CACHE_SIZE", 1024))
+USER_CACHE_TTL = int(getenv("USER_CACHE_TTL", 60))
+TOKEN_CACHE_SIZE = int(getenv("TOKEN_CACHE_SIZE", 4096))
 
+# Authenticated users keyed by token subject (email). Entries are expunged
+# from the session that loaded them, so no request can change them and a
+# rollback can't expire them: read them freely, but load a fresh row with
+# get_user_for_update before writing and call invalidate_user afterwards,
+# in a finally block so a failed commit doesn't leave the entry behind.
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
 
-def create_access_token(email: str, expires_delta: timedelta):
-    encode = {"sub": email}
+# Verified claims keyed by a hash of the whole token, signature included, so
+# a browser resending the same cookie skips jwt.decode. Entries expire with
+# the token's exp; a tampered token hashes differently and is verified.
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=COOKIE_DELTA * 60)
+
+
+class Principal:
+    """Identity taken from a stateless token without touching the database.
+
+    Has the ``id``, ``email`` and ``is_admin`` attributes routes read from a
+    ``User``; depend on ``auth_user_dependency`` when the full row is needed.
+    """
+
+    __slots__ = ("id", "email", "is_admin", "token_version")
+
+    def __init__(self, id: int, email: str, is_admin: bool, token_version: int):
+        self.id = id
+        self.email = email
+        self.is_admin = is_admin
+        self.token_version = token_version
+
+
+def create_access_token(email: str, expires_delta: timedelta, claims: dict = None):
+    encode = {"sub": email, **(claims or {})}
     expires = datetime.now(timezone.utc) + expires_delta
     encode.update({"exp": expires})
     return jwt.encode(encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-async def get_current_user(db: db_dependency, access_token: str = Cookie(None)):
+def token_key(access_token: str):
+    return sha256(access_token.encode()).digest()
+
+
+def decode_access_token(access_token: str):
+    key = token_key(access_token)
+    payload = token_cache.get(key)
+    if payload is None:
+        payload = jwt.decode(access_token, SECRET_KEY, algorithms=[ALGORITHM])
+        remaining = payload.get("exp", 0) - time()
+        if remaining > 0:
+            token_cache.set(key, payload, remaining)
+    return payload
+
+
+def forget_token(access_token: str):
+    if access_token:
+        token_cache.delete(token_key(access_token))
+
+
+async def load_user(db, email: str):
+    user = user_cache.get(email)
+    if user is not None:
+        return user
+    user = await db.scalar(
+        select(User).options(selectinload(User.profile)).where(User.email == email)
+    )
+    if user is None:
+        raise credentials_exception
+    db.expunge(user)
+    if user.profile is not None:
+        db.expunge(user.profile)
+    user_cache.set(email, user)
+    return user
+
+
+async def get_current_principal(db: db_dependency, access_token: str = Cookie(None)):
     try:
         if access_token is None:
             raise credentials_exception
-        payload = jwt.decode(access_token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(access_token)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
-        user = db.query(User).filter(User.email == email).first()
-        if user is None:
-            raise credentials_exception
-        return user
+        # Tokens issued before stateless mode was switched on carry no user
+        # id; they keep working through the lookup until they expire.
+        if STATELESS_TOKENS and "uid" in payload:
+            principal = Principal(
+                payload["uid"], email, bool(payload.get("adm")), payload.get("ver", 0)
+            )
+            if not token_versions.is_current(principal.id, principal.token_version):
+                raise credentials_exception
+            return principal
+        return await load_user(db, email)
     except JWTError:
         raise credentials_exception
 
 
+auth_principal_dependency = Annotated[str, Depends(get_current_principal)]
+
+
+async def get_current_user(db: db_dependency, principal: auth_principal_dependency):
+    if isinstance(principal, Principal):
+        return await load_user(db, principal.email)
+    return principal
+
+
+def invalidate_user(email: str):
+    user_cache.delete(email)
+
+
+async def get_user_for_update(db, user):
+    fresh_user = await db.scalar(
+        select(User)
+        .options(selectinload(User.profile))
+        .where(User.id == user.id)
+        .execution_options(populate_existing=True)
+    )
+    if fresh_user is None:
+        invalidate_user(user.email)
+        raise credentials_exception
+    return fresh_user
+
+
 auth_user_dependency = Annotated[str, Depends(get_current_user)]
 
 
-async def get_current_admin(db: db_dependency, user: auth_user_dependency):
+async def get_current_admin(user: auth_principal_dependency):
     if not user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required"
@@ -56,13 +161,16 @@ async def get_current_admin(db: db_dependency, user: auth_user_dependency):
 auth_admin_dependency = Annotated[str, Depends(get_current_admin)]
 
 
+csrf_exception = HTTPException(
+    status_code=status.HTTP_403_FORBIDDEN, detail="CSRF validation failed"
+)
+
+
 def csrf_validator(request: Request):
     cookie_csrf_token = request.cookies.get("csrf_token2")
     header_csrf_token = request.headers.get("X-CSRF-Token")
     if not header_csrf_token or header_csrf_token != cookie_csrf_token:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="CSRF validation failed"
-        )
+        raise csrf_exception
     return cookie_csrf_token
 
 
@@ -82,12 +190,14 @@ async def login(
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Already logged in"
         )
-    user = db.query(User).filter_by(email=form_data.email).first()
+    user = await db.scalar(select(User).filter_by(email=form_data.email))
     if not user:
         raise credentials_exception
-    check_password(form_data.password.get_secret_value(), user.password)
+    await check_password(form_data.password.get_secret_value(), user.password)
     csrf_token = token_urlsafe(CSRF_TOKEN_SIZE)
-    access_token = create_access_token(user.email, timedelta(minutes=COOKIE_DELTA))
+    access_token = create_access_token(
+        user.email, timedelta(minutes=COOKIE_DELTA), await token_claims(db, user)
+    )
     response = JSONResponse(
         content={"detail": "Logged in successfully"},
         status_code=status.HTTP_200_OK,
@@ -128,8 +238,15 @@ async def login(
 @router.post("/logout")
 @limiter.limit("15/minute", per_method=True)
 async def logout(
-    request: Request, user: auth_user_dependency, crsf_token: csrf_dependency
+    request: Request, user: auth_principal_dependency, db: db_dependency,
+    crsf_token: csrf_dependency, access_token: str = Cookie(None),
 ):
+    # Stateless tokens cannot be deleted server side, so logging out moves
+    # the user to a new token version, which ends all of their sessions.
+    version = await revoke_tokens(db, user.id)
+    await db.commit()
+    record_revocation(user.id, version)
+    forget_token(access_token)
     response = JSONResponse(
         content={"detail": "Logged out successfully"}, status_code=status.HTTP_200_OK
     )
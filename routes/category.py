@@ -1,16 +1,23 @@
 from fastapi import APIRouter, HTTPException, status, Request
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 from models.category import Category
 from fastapi.responses import JSONResponse
 from database import db_dependency
-from validators.category import create_category_dependency, update_category_dependency, get_id_dependency
+from validators.category import create_category_dependency, update_category_dependency, get_id_dependency, CategoryListResponse, CategoryDetailResponse
 from routes.auth import auth_user_dependency, csrf_dependency, auth_admin_dependency
-from fastapi.encoders import jsonable_encoder
+from serialization import FastJSONResponse, row_serializer
 from security import limiter
+from catalogue_cache import catalogue_cache
+from conditional import check_not_modified
+from sql_profiler import query_budget
 from html import escape
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
+CATEGORY_COLUMNS = (Category.id, Category.name)
+
+serialize_category_row = row_serializer(CATEGORY_COLUMNS)
+
 
 @router.post("/create", status_code=status.HTTP_201_CREATED)
 async def create_category(
@@ -19,7 +26,7 @@ async def create_category(
     crsf_token: csrf_dependency,
     auth_admin_dependency: auth_admin_dependency,
     ):
-    existing_category = db.query(Category).filter(Category.name == create_category_request.name).first()
+    existing_category = await db.scalar(select(Category).where(Category.name == create_category_request.name))
 
     if existing_category:
         raise HTTPException(
@@ -31,7 +38,8 @@ async def create_category(
     new_category = Category(name=sanitized_name)
     
     db.add(new_category)
-    db.commit()
+    await db.commit()
+    await catalogue_cache.bump_version()
     
     return JSONResponse (
         {"detail": "Category created successfully",
@@ -40,44 +48,57 @@ async def create_category(
         )
 
 
-@router.get("/all", status_code=status.HTTP_200_OK)
+@router.get("/all", status_code=status.HTTP_200_OK, response_model=CategoryListResponse, dependencies=[query_budget(1)])
 @limiter.limit("20/minute")
 async def get_all_categories(
     request: Request,
     db: db_dependency = db_dependency,
     crsf_token: csrf_dependency = csrf_dependency,):
-    categories = db.query(Category).all()
+    not_modified, validators = await check_not_modified(request)
+    if not_modified:
+        return not_modified
+
+    serialized_categories = [
+        serialize_category_row(row) for row in await db.execute(select(*CATEGORY_COLUMNS))
+    ]
     
-    if not categories:
+    if not serialized_categories:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No categories found"
         )
     
-    serialized_categories = jsonable_encoder(categories)
-    
-    return JSONResponse(
-        {"categories": serialized_categories}
+    return FastJSONResponse(
+        {"categories": serialized_categories},
+        headers=validators,
         )
 
 
-@router.get("/{category_id}", status_code=status.HTTP_200_OK)
+@router.get("/{category_id}", status_code=status.HTTP_200_OK, response_model=CategoryDetailResponse, dependencies=[query_budget(1)])
 async def get_category_by_id(
+    request: Request,
     category_id: int, db: db_dependency,
     category_request: get_id_dependency,
     crsf_token: csrf_dependency,
     ):
-    category = db.query(Category).filter(Category.id == category_request.category_id).first()
+    row = (await db.execute(
+        select(*CATEGORY_COLUMNS).where(Category.id == category_request.category_id)
+    )).first()
     
-    if not category:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Category with ID {category_id} not found"
         )
+
+    not_modified, validators = await check_not_modified(request)
+    if not_modified:
+        return not_modified
     
-    serialized_category = jsonable_encoder(category)
-    return JSONResponse( 
-        {"category":serialized_category}
+    serialized_category = serialize_category_row(row)
+    return FastJSONResponse( 
+        {"category":serialized_category},
+        headers=validators,
         )
 
 
@@ -88,7 +109,7 @@ async def update_category(
     db: db_dependency,
     crsf_token: csrf_dependency,
     auth_admin_dependency: auth_admin_dependency):
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await db.scalar(select(Category).where(Category.id == category_id))
     
     if not category:
         raise HTTPException(
@@ -99,7 +120,8 @@ async def update_category(
     sanitized_name=escape(updated_data.name)
     category.name = sanitized_name
     
-    db.commit()
+    await db.commit()
+    await catalogue_cache.invalidate_all()
     
     return JSONResponse(
         {"detail": "Category updated successfully",
@@ -113,7 +135,7 @@ async def delete_category(
     db: db_dependency,
     crsf_token: csrf_dependency,
     auth_admin_dependency: auth_admin_dependency,):
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await db.scalar(select(Category).where(Category.id == category_id))
     
     if not category:
         raise HTTPException(
@@ -121,8 +143,9 @@ async def delete_category(
             detail=f"Category with ID {category_id} not found"
         )
     
-    db.delete(category)
-    db.commit()
+    await db.delete(category)
+    await db.commit()
+    await catalogue_cache.invalidate_all()
     
     return JSONResponse(
         {"detail": f"Category with ID {category_id} deleted successfully"}
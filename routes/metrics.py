@@ -0,0 +1,47 @@
+from os import getenv
+from hmac import compare_digest
+from fastapi import APIRouter, HTTPException, status, Request
+from fastapi.responses import JSONResponse, Response
+from database import pool_status
+from instrumentation import render_metrics
+from security import hash_stats, HASH_WORKERS, HASH_MAX_QUEUE
+from routes.auth import csrf_dependency, auth_admin_dependency
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+# Scrapers cannot log in, so the Prometheus endpoint is protected by a
+# bearer token instead; without METRICS_TOKEN it is switched off.
+METRICS_TOKEN = getenv("METRICS_TOKEN")
+
+
+@router.get("", status_code=status.HTTP_200_OK, include_in_schema=False)
+async def scrape_metrics(request: Request):
+    authorization = request.headers.get("Authorization", "")
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not compare_digest(authorization.encode(), f"Bearer {METRICS_TOKEN}".encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@router.get("/pool", status_code=status.HTTP_200_OK)
+async def get_pool_metrics(
+    crsf_token: csrf_dependency,
+    auth_admin_dependency: auth_admin_dependency,
+):
+    return JSONResponse(
+        content={
+            "database": pool_status(),
+            "password_hashing": {
+                "workers": HASH_WORKERS,
+                "max_queue": HASH_MAX_QUEUE,
+                **hash_stats,
+            },
+        },
+        status_code=status.HTTP_200_OK,
+    )
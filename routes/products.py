@@ -1,22 +1,218 @@
 from fastapi import APIRouter, HTTPException, status, Request
+from pydantic import ValidationError
+from sqlalchemy import select, insert, update, cast, func, case, Numeric
+from sqlalchemy.exc import SQLAlchemyError
 from models.product import Product
 from models.category import Category
-from fastapi.responses import JSONResponse
-from database import db_dependency
-from fastapi.encoders import jsonable_encoder
-from validators.product import create_product_dependency, update_product_dependency,get_id_dependency, sorting_dependency, filtering_dependency, OrderEnum, is_active_dependency
+from csv import writer as csv_writer, DictReader
+from io import StringIO
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from database import db_dependency, SessionLocal
+from validators.product import CreateProductRequest, BulkIsActiveRequest, BulkPriceRequest, PriceChangeModeEnum, create_product_dependency, update_product_dependency,get_id_dependency, sorting_dependency, filtering_dependency, OrderEnum, is_active_dependency, pagination_dependency, ProductListResponse, ProductDetailResponse, export_dependency, ExportFormatEnum, search_dependency, ProductSearchResponse, facets_dependency, MAX_PRICE_BANDS
 from routes.auth import csrf_dependency, auth_admin_dependency
 from html import escape
 from security import limiter
+from pagination import keyset_paginate, next_page_cursor
+from catalogue_cache import catalogue_cache
+from serialization import FastJSONResponse, row_serializer, dumps
+from search import search_terms, apply_search
+from conditional import check_not_modified
+from sql_profiler import query_budget
+from response_compression import COMPRESSION_MIN_SIZE, negotiate_encoding, compress_body_async, set_encoded_headers
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
+EXPORT_BATCH_SIZE = 1000
+IMPORT_BATCH_SIZE = 1000
+IMPORT_MAX_ROWS = 50000
+MIN_BULK_PRICE = 0.01
+
+
+PRODUCT_COLUMNS = (
+    Product.id,
+    Product.name,
+    Product.description,
+    Product.price,
+    Product.size,
+    Product.category_id,
+    Product.image_url,
+    Product.is_active,
+    Category.name.label("category_name"),
+)
+
+serialize_product_row = row_serializer(PRODUCT_COLUMNS)
+serialize_search_row = row_serializer([*PRODUCT_COLUMNS, "rank"])
+
+
+def product_query():
+    return select(*PRODUCT_COLUMNS).outerjoin(
+        Category, Product.category_id == Category.id
+    )
+
+
+def filter_products(query, filtering):
+    # Category is matched through a subquery rather than a join so the same
+    # filter applies to SELECT and UPDATE statements alike.
+    if filtering.category:
+        query = query.where(
+            Product.category_id
+            == select(Category.id).where(Category.name == filtering.category).scalar_subquery()
+        )
+    
+    if filtering.is_active is not None:
+        query = query.where(Product.is_active == filtering.is_active)
+    
+    if filtering.min_price is not None:
+        query = query.where(Product.price >= filtering.min_price)
+    
+    if filtering.max_price is not None:
+        query = query.where(Product.price <= filtering.max_price)
+
+    return query
+
+
+def product_csv_chunk(rows, header: bool = False):
+    buffer = StringIO()
+    writer = csv_writer(buffer)
+    if header:
+        writer.writerow([column.key for column in PRODUCT_COLUMNS])
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def stream_products(query, export_format: ExportFormatEnum):
+    # The request's session is closed before a streaming body is sent, so the
+    # export holds its own session and server-side cursor while it streams.
+    async with SessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        if export_format == ExportFormatEnum.csv:
+            yield product_csv_chunk([], header=True)
+        async for rows in result.partitions():
+            if export_format == ExportFormatEnum.csv:
+                yield product_csv_chunk(rows)
+            else:
+                yield b"".join(dumps(serialize_product_row(row)) + b"\n" for row in rows)
+
+
+async def read_import_rows(request: Request):
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("application/json"):
+        try:
+            rows = await request.json()
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON body"
+            )
+        if not isinstance(rows, list):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Expected a JSON array of products",
+            )
+        return rows
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Expected a CSV file in the 'file' field",
+            )
+        try:
+            text = (await upload.read()).decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="CSV file must be UTF-8"
+            )
+        # Empty CSV cells mean "not provided", like a missing JSON key.
+        return [
+            {key: value for key, value in row.items() if value not in ("", None)}
+            for row in DictReader(StringIO(text))
+        ]
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail="Send a JSON array or a multipart CSV upload",
+    )
+
+
+def sanitize_new_product(product: CreateProductRequest, category_id: int):
+    return {
+        "name": escape(product.name),
+        "description": escape(product.description) if product.description is not None else None,
+        "price": product.price,
+        "size": escape(product.size) if product.size is not None else None,
+        "category_id": category_id,
+        "image_url": product.image_url,
+        "is_active": product.is_active,
+    }
+
+
+def price_band_expression(bands: list):
+    return case(
+        *[(Product.price < band, index) for index, band in enumerate(bands)],
+        else_=len(bands),
+    )
+
+
+def build_facets(rows, bands: list):
+    categories = {}
+    price_bands = [0] * (len(bands) + 1)
+    availability = {}
+    total = 0
+    for category_id, category_name, band, is_active, count in rows:
+        total += count
+        category = categories.setdefault(
+            category_id, {"id": category_id, "name": category_name, "count": 0}
+        )
+        category["count"] += count
+        price_bands[band] += count
+        availability[is_active] = availability.get(is_active, 0) + count
+
+    boundaries = [None, *bands, None]
+    return {
+        "total": total,
+        "categories": sorted(categories.values(), key=lambda category: -category["count"]),
+        "price_bands": [
+            {"min_price": boundaries[index], "max_price": boundaries[index + 1], "count": count}
+            for index, count in enumerate(price_bands)
+        ],
+        "availability": [
+            {"is_active": is_active, "count": count}
+            for is_active, count in sorted(availability.items(), key=lambda item: str(item[0]))
+        ],
+    }
+
+
+def bulk_update_statement(selection):
+    statement = update(Product).execution_options(synchronize_session=False)
+    if selection.ids is not None:
+        return statement.where(Product.id.in_(selection.ids))
+    return filter_products(statement, selection.filter)
+
+
+async def cached_json_response(request: Request, cache_key: str, body: bytes, headers: dict = None):
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    if encoding is None or len(body) < COMPRESSION_MIN_SIZE:
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    encoded = await catalogue_cache.get_encoded(cache_key, encoding)
+    if encoded is None:
+        encoded = await compress_body_async(body, encoding)
+        await catalogue_cache.set_encoded(cache_key, encoding, encoded)
+    response = Response(content=encoded, media_type="application/json", headers=headers)
+    set_encoded_headers(response.headers, encoding, len(encoded))
+    return response
+
+
+async def cache_json_response(request: Request, cache_key: str, response: FastJSONResponse, headers: dict = None):
+    await catalogue_cache.set(cache_key, response.body)
+    return await cached_json_response(request, cache_key, response.body, headers)
+
 
 @router.post("/create", status_code=status.HTTP_201_CREATED)
 async def create_product(create_product_request: create_product_dependency, db: db_dependency, 
                          crsf_token: csrf_dependency, auth_admin_dependency: auth_admin_dependency, 
                          ):
-    category = db.query(Category).filter(Category.name == create_product_request.category).first()
+    category = await db.scalar(select(Category).where(Category.name == create_product_request.category))
     
     if not category:
         raise HTTPException(
@@ -40,32 +236,111 @@ async def create_product(create_product_request: create_product_dependency, db:
     )
     
     db.add(new_product)
-    db.commit()
+    await db.commit()
+    await catalogue_cache.invalidate_lists()
     return JSONResponse(
         {"detail": "Product created successfully"},
         status_code=status.HTTP_201_CREATED
     )
     
 
-@router.get("/all", status_code=status.HTTP_200_OK)
+@router.post("/import", status_code=status.HTTP_200_OK)
+@limiter.limit("5/minute")
+async def import_products(
+    request: Request,
+    db: db_dependency,
+    crsf_token: csrf_dependency,
+    auth_admin_dependency: auth_admin_dependency,
+):
+    rows = await read_import_rows(request)
+    if len(rows) > IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Import is limited to {IMPORT_MAX_ROWS} products per request",
+        )
+
+    errors = []
+    valid_products = []
+    for index, row in enumerate(rows):
+        try:
+            valid_products.append((index, CreateProductRequest.model_validate(row)))
+        except ValidationError as exc:
+            errors.append({"row": index, "detail": ", ".join(err["msg"] for err in exc.errors())})
+
+    category_names = {product.category for _, product in valid_products}
+    category_ids = dict(
+        (await db.execute(
+            select(Category.name, Category.id).where(Category.name.in_(category_names))
+        )).all()
+    ) if category_names else {}
+
+    new_products = []
+    for index, product in valid_products:
+        category_id = category_ids.get(product.category)
+        if category_id is None:
+            errors.append({"row": index, "detail": f"Category '{product.category}' not found"})
+            continue
+        new_products.append((index, sanitize_new_product(product, category_id)))
+
+    created = 0
+    for start in range(0, len(new_products), IMPORT_BATCH_SIZE):
+        batch = new_products[start:start + IMPORT_BATCH_SIZE]
+        try:
+            async with db.begin_nested():
+                await db.execute(insert(Product), [values for _, values in batch])
+            created += len(batch)
+        except SQLAlchemyError:
+            errors.extend(
+                {"row": index, "detail": "Database rejected the batch containing this row"}
+                for index, _ in batch
+            )
+    await db.commit()
+    if created:
+        await catalogue_cache.invalidate_lists()
+
+    errors.sort(key=lambda error: error["row"])
+    return JSONResponse(
+        content={
+            "detail": f"Imported {created} of {len(rows)} products",
+            "created": created,
+            "errors": errors,
+        },
+        status_code=status.HTTP_200_OK,
+    )
+
+
+@router.get("/all", status_code=status.HTTP_200_OK, response_model=ProductListResponse, dependencies=[query_budget(1)])
 @limiter.limit("20/minute")
-async def get_all_products(request: Request, skip: int = 0, limit: int = 10, db: db_dependency = db_dependency,
+async def get_all_products(request: Request, pagination: pagination_dependency, skip: int = 0,
+                           db: db_dependency = db_dependency,
                            crsf_token: csrf_dependency=csrf_dependency,
                         ):
-    products = db.query(Product).offset(skip).limit(limit).all()
+    not_modified, validators = await check_not_modified(request)
+    if not_modified:
+        return not_modified
+
+    cache_key = await catalogue_cache.list_key("all", {**pagination.model_dump(), "skip": skip})
+    cached_body = await catalogue_cache.get(cache_key)
+    if cached_body is not None:
+        return await cached_json_response(request, cache_key, cached_body, validators)
+
+    query = keyset_paginate(product_query(), "id", [Product.id], False, pagination.cursor, pagination.limit)
+    if skip and pagination.cursor is None:
+        query = query.offset(skip)
+    serialized_products, next_cursor = next_page_cursor(
+        [serialize_product_row(row) for row in await db.execute(query)], "id", ["id"], pagination.limit
+    )
     
-    if not products:
+    if not serialized_products:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No products found"
         )
     
-    serialized_products = jsonable_encoder(products)
-    
-    return JSONResponse(
-        content={"products": serialized_products}, 
+    return await cache_json_response(request, cache_key, FastJSONResponse(
+        content={"products": serialized_products, "next_cursor": next_cursor}, 
         status_code=status.HTTP_200_OK
-    )
+    ), validators)
 
 @router.put("/{product_id}", status_code=status.HTTP_200_OK)
 async def update_product(
@@ -74,7 +349,7 @@ async def update_product(
     db: db_dependency,
     crsf_token: csrf_dependency, auth_admin_dependency: auth_admin_dependency,
 ):
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.scalar(select(Product).where(Product.id == product_id))
     
     if not product:
         raise HTTPException(
@@ -83,7 +358,7 @@ async def update_product(
         )
     
     if update_product_request.category:
-        category = db.query(Category).filter(Category.name == update_product_request.category).first()
+        category = await db.scalar(select(Category).where(Category.name == update_product_request.category))
         if not category:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -110,7 +385,8 @@ async def update_product(
     if update_product_request.is_active is not None:
         product.is_active = update_product_request.is_active
     
-    db.commit()
+    await db.commit()
+    await catalogue_cache.invalidate_product(product_id)
     
     return JSONResponse(
         content={
@@ -133,7 +409,7 @@ async def update_product(
 async def delete_product(product_id: int, db: db_dependency,
                          crsf_token: csrf_dependency, auth_admin_dependency: auth_admin_dependency,
                          ):
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.scalar(select(Product).where(Product.id == product_id))
     
     if not product:
         raise HTTPException(
@@ -141,69 +417,182 @@ async def delete_product(product_id: int, db: db_dependency,
             detail=f"Product with ID {product_id} not found"
         )
     
-    db.delete(product)
-    db.commit()
+    await db.delete(product)
+    await db.commit()
+    await catalogue_cache.invalidate_product(product_id)
     
     return JSONResponse(
         {"detail": f"Product with ID {product_id} deleted successfully"}
     )
 
-@router.get("/sorted", status_code=status.HTTP_200_OK)
+@router.get("/sorted", status_code=status.HTTP_200_OK, response_model=ProductListResponse, dependencies=[query_budget(1)])
 @limiter.limit("20/minute")
 async def get_sorted_products(
     request: Request,
-    # skip: int = 0,
-    # limit: int = 10,
+    pagination: pagination_dependency,
     db: db_dependency = db_dependency,
     sorting_dependency: sorting_dependency = sorting_dependency,
     crsf_token: csrf_dependency = csrf_dependency,
 ):
+    cache_key = await catalogue_cache.list_key(
+        "sorted", {**sorting_dependency.model_dump(), **pagination.model_dump()}
+    )
+    cached_body = await catalogue_cache.get(cache_key)
+    if cached_body is not None:
+        return await cached_json_response(request, cache_key, cached_body)
 
-    order_column = getattr(Product, sorting_dependency.sort_by.value)
-    if sorting_dependency.order == OrderEnum.desc:
-        order_column = order_column.desc()
+    sort_by = sorting_dependency.sort_by.value
+    descending = sorting_dependency.order == OrderEnum.desc
+    query = keyset_paginate(
+        product_query(), sort_by, [getattr(Product, sort_by), Product.id], descending,
+        pagination.cursor, pagination.limit,
+    )
+    serialized_products, next_cursor = next_page_cursor(
+        [serialize_product_row(row) for row in await db.execute(query)],
+        sort_by, [sort_by, "id"], pagination.limit,
+    )
+    
+    return await cache_json_response(request, cache_key, FastJSONResponse(
+        content={"products": serialized_products, "next_cursor": next_cursor},
+        status_code=status.HTTP_200_OK,
+    ))
 
-    products = db.query(Product).order_by(order_column).all()
+@router.get("/filtered", status_code=status.HTTP_200_OK, response_model=ProductListResponse, dependencies=[query_budget(1)])
+@limiter.limit("20/minute")
+async def get_filtered_products(
+    request: Request,
+    filtering_dependency: filtering_dependency,
+    pagination: pagination_dependency,
+    db: db_dependency = db_dependency,
+    crsf_token: csrf_dependency = csrf_dependency,
+):
+    cache_key = await catalogue_cache.list_key(
+        "filtered", {**filtering_dependency.model_dump(), **pagination.model_dump()}
+    )
+    cached_body = await catalogue_cache.get(cache_key)
+    if cached_body is not None:
+        return await cached_json_response(request, cache_key, cached_body)
 
-    serialized_products = jsonable_encoder(products)
+    query = keyset_paginate(
+        filter_products(product_query(), filtering_dependency), "id", [Product.id], False,
+        pagination.cursor, pagination.limit,
+    )
+    serialized_products, next_cursor = next_page_cursor(
+        [serialize_product_row(row) for row in await db.execute(query)], "id", ["id"], pagination.limit
+    )
     
-    return JSONResponse(
-        content={"products": serialized_products},
+    return await cache_json_response(request, cache_key, FastJSONResponse(
+        content={"products": serialized_products, "next_cursor": next_cursor},
         status_code=status.HTTP_200_OK,
+    ))
+
+@router.get("/search", status_code=status.HTTP_200_OK, response_model=ProductSearchResponse, dependencies=[query_budget(1)])
+@limiter.limit("30/minute")
+async def search_products(
+    request: Request,
+    search: search_dependency,
+    filtering_dependency: filtering_dependency,
+    pagination: pagination_dependency,
+    db: db_dependency = db_dependency,
+    crsf_token: csrf_dependency = csrf_dependency,
+):
+    terms = search_terms(search.q)
+    if not terms:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search must contain at least one letter or digit",
+        )
+
+    cache_key = await catalogue_cache.list_key(
+        "search",
+        {"q": " ".join(terms), **filtering_dependency.model_dump(), **pagination.model_dump()},
+    )
+    cached_body = await catalogue_cache.get(cache_key)
+    if cached_body is not None:
+        return await cached_json_response(request, cache_key, cached_body)
+
+    query, rank = apply_search(
+        filter_products(product_query(), filtering_dependency), db.bind.dialect.name, terms
+    )
+    cursor_key = "search:" + " ".join(terms)
+    query = keyset_paginate(
+        query.add_columns(rank.label("rank")), cursor_key, [rank, Product.id], True,
+        pagination.cursor, pagination.limit,
+    )
+    serialized_products, next_cursor = next_page_cursor(
+        [serialize_search_row(row) for row in await db.execute(query)],
+        cursor_key, ["rank", "id"], pagination.limit,
     )
 
-@router.get("/filtered", status_code=status.HTTP_200_OK)
+    return await cache_json_response(request, cache_key, FastJSONResponse(
+        content={"products": serialized_products, "next_cursor": next_cursor},
+        status_code=status.HTTP_200_OK,
+    ))
+
+@router.get("/facets", status_code=status.HTTP_200_OK, dependencies=[query_budget(1)])
 @limiter.limit("20/minute")
-async def get_filtered_products(
+async def get_product_facets(
     request: Request,
     filtering_dependency: filtering_dependency,
+    facets: facets_dependency,
     db: db_dependency = db_dependency,
     crsf_token: csrf_dependency = csrf_dependency,
 ):
-    query = db.query(Product)
+    cache_key = await catalogue_cache.list_key(
+        "facets", {**filtering_dependency.model_dump(), **facets.model_dump()}
+    )
+    cached_body = await catalogue_cache.get(cache_key)
+    if cached_body is not None:
+        return await cached_json_response(request, cache_key, cached_body)
 
-    if filtering_dependency.category:
-        query = query.join(Category).filter(Category.name == filtering_dependency.category)
-    
-    if filtering_dependency.is_active is not None:
-        query = query.filter(Product.is_active == filtering_dependency.is_active)
-    
-    if filtering_dependency.min_price is not None:
-        query = query.filter(Product.price >= filtering_dependency.min_price)
-    
-    if filtering_dependency.max_price is not None:
-        query = query.filter(Product.price <= filtering_dependency.max_price)
-    
-    products = query.all()
+    # One grouped query over (category, price band, availability); the three
+    # facets are rolled up from its few rows.
+    bands = facets.bands()
+    if len(bands) > MAX_PRICE_BANDS or any(band <= 0 for band in bands) or bands != sorted(set(bands)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Price bands must be at most {MAX_PRICE_BANDS} positive, strictly ascending numbers",
+        )
+    band = price_band_expression(bands).label("price_band")
+    query = filter_products(
+        select(Product.category_id, Category.name, band, Product.is_active, func.count())
+        .select_from(Product)
+        .outerjoin(Category, Product.category_id == Category.id),
+        filtering_dependency,
+    ).group_by(Product.category_id, Category.name, band, Product.is_active)
 
-    serialized_products = jsonable_encoder(products)
-    
-    return JSONResponse(
-        content={"products": serialized_products},
+    return await cache_json_response(request, cache_key, FastJSONResponse(
+        content={"facets": build_facets(await db.execute(query), bands)},
         status_code=status.HTTP_200_OK,
+    ))
+
+@router.get("/export", status_code=status.HTTP_200_OK)
+@limiter.limit("5/minute")
+async def export_products(
+    request: Request,
+    export: export_dependency,
+    filtering_dependency: filtering_dependency,
+    sorting_dependency: sorting_dependency,
+    crsf_token: csrf_dependency = csrf_dependency,
+):
+    sort_column = getattr(Product, sorting_dependency.sort_by.value)
+    if sorting_dependency.order == OrderEnum.desc:
+        order = [sort_column.desc(), Product.id.desc()]
+    else:
+        order = [sort_column.asc(), Product.id.asc()]
+    query = filter_products(product_query(), filtering_dependency).order_by(*order)
+
+    if export.format == ExportFormatEnum.csv:
+        media_type, extension = "text/csv", "csv"
+    else:
+        media_type, extension = "application/x-ndjson", "ndjson"
+    return StreamingResponse(
+        stream_products(query, export.format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="products.{extension}"'},
     )
 
-@router.get("/{product_id}", status_code=status.HTTP_200_OK)
+@router.get("/{product_id}", status_code=status.HTTP_200_OK, response_model=ProductDetailResponse, dependencies=[query_budget(1)])
 @limiter.limit("20/minute")
 async def get_product_by_id(
     request: Request,
@@ -212,27 +601,82 @@ async def get_product_by_id(
     db: db_dependency,
     crsf_token: csrf_dependency,
     ):
+    # A cached detail proves the product exists; otherwise look it up before
+    # answering 304, so a missing id is still a 404.
+    cache_key = await catalogue_cache.detail_key("product", product_request.product_id)
+    cached_body = await catalogue_cache.get(cache_key)
+    if cached_body is None:
+        row = (await db.execute(product_query().where(Product.id == product_request.product_id))).first()
 
-    product = db.query(Product).filter(Product.id == product_request.product_id).first()
-    
-    
-    if not product:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Product with ID {product_id} not found"
-        )
-    
-    category = db.query(Category).filter(Category.id == product.category_id).first()
-    print(category.name)
-    if category:
-        product.category_name = category.name
-    else:
-        product.category_name = "Category not found"
-    
-    serialized_product = jsonable_encoder(product)
-    return JSONResponse(
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Product with ID {product_id} not found"
+            )
+
+    not_modified, validators = await check_not_modified(request)
+    if not_modified:
+        return not_modified
+    if cached_body is not None:
+        return await cached_json_response(request, cache_key, cached_body, validators)
+
+    serialized_product = serialize_product_row(row)
+    if serialized_product["category_name"] is None:
+        serialized_product["category_name"] = "Category not found"
+    return await cache_json_response(request, cache_key, FastJSONResponse(
         content={"product": serialized_product}, 
         status_code=status.HTTP_200_OK
+    ), validators)
+
+@router.patch("/bulk/is_active", status_code=status.HTTP_200_OK)
+async def bulk_update_is_active(
+    bulk_request: BulkIsActiveRequest,
+    db: db_dependency,
+    crsf_token: csrf_dependency,
+    auth_admin_dependency: auth_admin_dependency,
+):
+    result = await db.execute(
+        bulk_update_statement(bulk_request).values(is_active=bulk_request.is_active)
+    )
+    await db.commit()
+    if result.rowcount:
+        await catalogue_cache.invalidate_all()
+
+    return JSONResponse(
+        content={
+            "detail": f"{result.rowcount} products updated successfully",
+            "updated": result.rowcount,
+        },
+        status_code=status.HTTP_200_OK,
+    )
+
+@router.patch("/bulk/price", status_code=status.HTTP_200_OK)
+async def bulk_update_price(
+    bulk_request: BulkPriceRequest,
+    db: db_dependency,
+    crsf_token: csrf_dependency,
+    auth_admin_dependency: auth_admin_dependency,
+):
+    if bulk_request.mode == PriceChangeModeEnum.absolute:
+        new_price = bulk_request.value
+    else:
+        factor = 1 + bulk_request.value / 100
+        rounded = func.round(cast(Product.price * factor, Numeric), 2)
+        # A deep cut on a cheap product can round to 0.00; prices must stay
+        # above 0 like everywhere else, so they bottom out at one cent.
+        new_price = case((rounded < MIN_BULK_PRICE, MIN_BULK_PRICE), else_=rounded)
+
+    result = await db.execute(bulk_update_statement(bulk_request).values(price=new_price))
+    await db.commit()
+    if result.rowcount:
+        await catalogue_cache.invalidate_all()
+
+    return JSONResponse(
+        content={
+            "detail": f"{result.rowcount} products updated successfully",
+            "updated": result.rowcount,
+        },
+        status_code=status.HTTP_200_OK,
     )
 
 @router.patch("/{product_id}/is_active", status_code=status.HTTP_200_OK)
@@ -243,7 +687,7 @@ async def update_is_active(
     crsf_token: csrf_dependency = csrf_dependency,
     auth_admin_dependency: auth_admin_dependency = auth_admin_dependency, 
 ):
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.scalar(select(Product).where(Product.id == product_id))
 
     if not product:
         raise HTTPException(
@@ -252,7 +696,8 @@ async def update_is_active(
         )
 
     product.is_active = is_active_dependency.is_active
-    db.commit()
+    await db.commit()
+    await catalogue_cache.invalidate_product(product_id)
 
     return JSONResponse(
         content={
@@ -1,12 +1,14 @@
 from os import getenv
-from fastapi import APIRouter, HTTPException, status, Request
+from fastapi import APIRouter, HTTPException, status, Request, Cookie
 from fastapi.responses import JSONResponse
 from html import escape
 from datetime import timedelta
+from sqlalchemy import select
 from database import db_dependency
+from sql_profiler import query_budget
 from security import (
     hash_password,
-    MASTER_PASSWORD_HASH,
+    master_password_hash,
     check_password,
     simple_check_password,
     limiter,
@@ -18,7 +20,16 @@ from validators.users import (
     user_profile_dependency,
     change_password_dependency,
 )
-from routes.auth import auth_user_dependency, csrf_dependency, create_access_token
+from routes.auth import (
+    auth_user_dependency,
+    auth_principal_dependency,
+    csrf_dependency,
+    create_access_token,
+    get_user_for_update,
+    invalidate_user,
+    forget_token,
+)
+from token_versions import token_claims, revoke_tokens, record_revocation
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -36,12 +47,12 @@ async def create_user(
     form_data: login_or_create_or_update_user_dependency,
     crsf_token: csrf_dependency,
 ):
-    existing_user = db.query(User).filter_by(email=form_data.email).first()
+    existing_user = await db.scalar(select(User).filter_by(email=form_data.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="User already exists"
         )
-    hashed_password = hash_password(form_data.password.get_secret_value())
+    hashed_password = await hash_password(form_data.password.get_secret_value())
     sanitized_email = escape(form_data.email)
     if sanitized_email != form_data.email:
         raise HTTPException(
@@ -50,7 +61,7 @@ async def create_user(
         )
     user = User(email=sanitized_email, password=hashed_password, profile=UserProfile())
     db.add(user)
-    db.commit()
+    await db.commit()
     return JSONResponse(
         content={"detail": "User created successfully"},
         status_code=status.HTTP_201_CREATED,
@@ -61,12 +72,21 @@ async def create_user(
 @limiter.limit("15/minute", per_method=True)
 async def delete_user(
     request: Request,
-    user: auth_user_dependency,
+    user: auth_principal_dependency,
     db: db_dependency,
     crsf_token: csrf_dependency,
+    access_token: str = Cookie(None),
 ):
-    db.delete(user)
-    db.commit()
+    user = await get_user_for_update(db, user)
+    email = user.email
+    try:
+        await db.delete(user)
+        version = await revoke_tokens(db, user.id)
+        await db.commit()
+    finally:
+        invalidate_user(email)
+    record_revocation(user.id, version)
+    forget_token(access_token)
     response = JSONResponse(
         content={"detail": "User deleted successfully"}, status_code=status.HTTP_200_OK
     )
@@ -82,8 +102,10 @@ async def make_admin(
     crsf_token: csrf_dependency,
     form_data: make_or_remove_admin_dependency,
 ):
-    check_password(form_data.master_password.get_secret_value(), MASTER_PASSWORD_HASH)
-    user = db.query(User).filter_by(email=form_data.email).first()
+    await check_password(
+        form_data.master_password.get_secret_value(), await master_password_hash()
+    )
+    user = await db.scalar(select(User).filter_by(email=form_data.email))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
@@ -92,8 +114,14 @@ async def make_admin(
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="User is already an admin"
         )
-    user.is_admin = True
-    db.commit()
+    email = user.email
+    try:
+        user.is_admin = True
+        version = await revoke_tokens(db, user.id)
+        await db.commit()
+    finally:
+        invalidate_user(email)
+    record_revocation(user.id, version)
     return JSONResponse(
         content={"detail": "User is now admin"}, status_code=status.HTTP_200_OK
     )
@@ -107,8 +135,10 @@ async def remove_admin(
     crsf_token: csrf_dependency,
     form_data: make_or_remove_admin_dependency,
 ):
-    check_password(form_data.master_password.get_secret_value(), MASTER_PASSWORD_HASH)
-    user = db.query(User).filter_by(email=form_data.email).first()
+    await check_password(
+        form_data.master_password.get_secret_value(), await master_password_hash()
+    )
+    user = await db.scalar(select(User).filter_by(email=form_data.email))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
@@ -117,8 +147,14 @@ async def remove_admin(
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="User is not an admin"
         )
-    user.is_admin = False
-    db.commit()
+    email = user.email
+    try:
+        user.is_admin = False
+        version = await revoke_tokens(db, user.id)
+        await db.commit()
+    finally:
+        invalidate_user(email)
+    record_revocation(user.id, version)
     return JSONResponse(
         content={"detail": "User is not admin now"}, status_code=status.HTTP_200_OK
     )
@@ -128,25 +164,30 @@ async def remove_admin(
 @limiter.limit("30/minute", per_method=True)
 async def update_profile(
     request: Request,
-    user: auth_user_dependency,
+    user: auth_principal_dependency,
     db: db_dependency,
     form_data: user_profile_dependency,
     crsf_token: csrf_dependency,
 ):
-    user.profile.phone_number = (
-        escape(form_data.phone_number) or user.profile.phone_number
-    )
-    user.profile.address = escape(form_data.address) or user.profile.address
-    user.profile.city = escape(form_data.city) or user.profile.city
-    user.profile.postal_code = escape(form_data.postal_code) or user.profile.postal_code
-    db.commit()
+    user = await get_user_for_update(db, user)
+    email = user.email
+    try:
+        user.profile.phone_number = (
+            escape(form_data.phone_number) or user.profile.phone_number
+        )
+        user.profile.address = escape(form_data.address) or user.profile.address
+        user.profile.city = escape(form_data.city) or user.profile.city
+        user.profile.postal_code = escape(form_data.postal_code) or user.profile.postal_code
+        await db.commit()
+    finally:
+        invalidate_user(email)
     return JSONResponse(
         content={"detail": "Profile updated successfully"},
         status_code=status.HTTP_200_OK,
     )
 
 
-@router.get("/profile", status_code=status.HTTP_200_OK)
+@router.get("/profile", status_code=status.HTTP_200_OK, dependencies=[query_budget(2)])
 @limiter.limit("50/minute", per_method=True)
 async def read_profile(
     request: Request, user: auth_user_dependency, crsf_token: csrf_dependency
@@ -164,8 +205,9 @@ async def change_email(
     db: db_dependency,
     crsf_token: csrf_dependency,
     form_data: login_or_create_or_update_user_dependency,
+    access_token: str = Cookie(None),
 ):
-    check_password(form_data.password.get_secret_value(), user.password)
+    await check_password(form_data.password.get_secret_value(), user.password)
     sanitized_email = escape(form_data.email)
     if sanitized_email != form_data.email:
         raise HTTPException(
@@ -177,19 +219,28 @@ async def change_email(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="New Email is the same as the old one",
         )
-    existing_email = db.query(User).filter_by(email=form_data.email).first()
+    existing_email = await db.scalar(select(User).filter_by(email=form_data.email))
     if existing_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
         )
-    user.email = form_data.email
-    db.commit()
+    user = await get_user_for_update(db, user)
+    old_email = user.email
+    try:
+        user.email = form_data.email
+        version = await revoke_tokens(db, user.id)
+        claims = await token_claims(db, user)
+        await db.commit()
+    finally:
+        invalidate_user(old_email)
+    record_revocation(user.id, version)
+    forget_token(access_token)
 
     response = JSONResponse(
         content={"detail": "Email changed successfully"}, status_code=status.HTTP_200_OK
     )
-    access_token = create_access_token(user.email, timedelta(minutes=COOKIE_DELTA))
+    access_token = create_access_token(user.email, timedelta(minutes=COOKIE_DELTA), claims)
     response.set_cookie(
         "access_token",
         access_token,
@@ -211,16 +262,27 @@ async def change_password(
     db: db_dependency,
     crsf_token: csrf_dependency,
     form_data: change_password_dependency,
+    access_token: str = Cookie(None),
 ):
-    check_password(form_data.current_password.get_secret_value(), user.password)
-    if simple_check_password(form_data.new_password.get_secret_value(), user.password):
+    await check_password(form_data.current_password.get_secret_value(), user.password)
+    if await simple_check_password(
+        form_data.new_password.get_secret_value(), user.password
+    ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="New password is the same as the old one",
         )
-    hashed_password = hash_password(form_data.new_password.get_secret_value())
-    user.password = hashed_password
-    db.commit()
+    hashed_password = await hash_password(form_data.new_password.get_secret_value())
+    user = await get_user_for_update(db, user)
+    email = user.email
+    try:
+        user.password = hashed_password
+        version = await revoke_tokens(db, user.id)
+        await db.commit()
+    finally:
+        invalidate_user(email)
+    record_revocation(user.id, version)
+    forget_token(access_token)
     return JSONResponse(
         content={"detail": "Password changed successfully"},
         status_code=status.HTTP_200_OK,
@@ -0,0 +1,28 @@
+from re import findall
+from sqlalchemy import func, literal_column, text, bindparam, table, column
+from models.product import Product
+
+MAX_SEARCH_TERMS = 8
+
+products_fts = table("products_fts", column("rowid"))
+
+
+def search_terms(phrase: str):
+    return findall(r"\w+", phrase.lower())[:MAX_SEARCH_TERMS]
+
+
+def apply_search(query, dialect: str, terms: list):
+    """Restrict ``query`` to products matching every term as a prefix and
+    return it with a relevance expression where higher is better."""
+    if dialect == "postgresql":
+        ts_query = func.to_tsquery(
+            "english", bindparam("search_query", " & ".join(f"{term}:*" for term in terms))
+        )
+        search_vector = literal_column("products.search_vector")
+        rank = func.ts_rank(search_vector, ts_query)
+        return query.where(search_vector.op("@@")(ts_query)), rank
+
+    match = " ".join(f'"{term}"*' for term in terms)
+    query = query.join(products_fts, products_fts.c.rowid == Product.id).where(text("products_fts MATCH :search_query").bindparams(search_query=match))
+    # bm25() is lower for better matches.
+    return query, -literal_column("bm25(products_fts)")
@@ -1,40 +1,124 @@
+from asyncio import Semaphore, get_running_loop
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from argon2 import PasswordHasher
 from fastapi import HTTPException, status
 from os import getenv
 from slowapi import Limiter
 from slowapi.util import get_remote_address
+import rate_limit_storage  # registers the sqlite:// limiter storage
+from instrumentation import observe_hash_job, set_hash_queue_depth
 
 ph = PasswordHasher()
 
+# Hashing MASTER_PASSWORD costs a full Argon2 run, so it happens on first
+# use instead of in every worker at import. Setting MASTER_PASSWORD_HASH
+# (generate it with `python -m security`) avoids the run entirely.
 MASTER_PASSWORD = getenv("MASTER_PASSWORD")
-MASTER_PASSWORD_HASH = ph.hash(MASTER_PASSWORD)
+MASTER_PASSWORD_HASH = getenv("MASTER_PASSWORD_HASH")
+if MASTER_PASSWORD_HASH and not MASTER_PASSWORD_HASH.startswith("$argon2"):
+    raise RuntimeError("MASTER_PASSWORD_HASH must be an Argon2 hash")
+
+
+HASH_POOL = getenv("HASH_POOL", "thread")
+HASH_WORKERS = int(getenv("HASH_WORKERS", 2))
+HASH_MAX_QUEUE = int(getenv("HASH_MAX_QUEUE", 64))
+RATE_LIMIT_STORAGE_URI = getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+RATE_LIMIT_STRATEGY = getenv("RATE_LIMIT_STRATEGY", "sliding-window-counter")
+RATE_LIMIT_ENABLED = getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
 
 
 credentials_exception = HTTPException(
     status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
 )
 
+server_busy_exception = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Server is busy, please try again later",
+)
+
 limiter = Limiter(
     key_func=get_remote_address,
-    strategy="fixed-window",
-    storage_uri="memory://",
-    enabled=True,
+    strategy=RATE_LIMIT_STRATEGY,
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    enabled=RATE_LIMIT_ENABLED,
 )
 
 
-def hash_password(password):
-    return ph.hash(password)
+# Argon2 work runs on a bounded pool so a burst of logins can't freeze the
+# event loop. At most HASH_WORKERS jobs run at once and at most
+# HASH_MAX_QUEUE wait for a slot; beyond that requests get a 503.
+if HASH_POOL == "process":
+    hash_executor = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+else:
+    hash_executor = ThreadPoolExecutor(
+        max_workers=HASH_WORKERS, thread_name_prefix="argon2"
+    )
+
+hash_slots = Semaphore(HASH_WORKERS)
+hash_stats = {"queued": 0, "running": 0, "rejected": 0}
+
 
+def track_queued(change: int):
+    hash_stats["queued"] += change
+    set_hash_queue_depth(hash_stats["queued"])
 
-def check_password(password, hashed_password):
+
+async def run_hash_job(function, *args):
+    if hash_stats["queued"] >= HASH_MAX_QUEUE:
+        hash_stats["rejected"] += 1
+        raise server_busy_exception
+    track_queued(1)
+    queued = True
     try:
-        return ph.verify(hashed_password, password)
-    except:
-        raise credentials_exception
+        async with hash_slots:
+            track_queued(-1)
+            queued = False
+            hash_stats["running"] += 1
+            started = perf_counter()
+            try:
+                return await get_running_loop().run_in_executor(
+                    hash_executor, function, *args
+                )
+            finally:
+                hash_stats["running"] -= 1
+                observe_hash_job(function.__name__, perf_counter() - started)
+    finally:
+        if queued:
+            track_queued(-1)
 
 
-def simple_check_password(password, hashed_password):
+def verify_hash(password, hashed_password):
     try:
         return ph.verify(hashed_password, password)
     except:
         return False
+
+
+async def hash_password(password):
+    return await run_hash_job(ph.hash, password)
+
+
+async def check_password(password, hashed_password):
+    if not await run_hash_job(verify_hash, password, hashed_password):
+        raise credentials_exception
+    return True
+
+
+async def simple_check_password(password, hashed_password):
+    return await run_hash_job(verify_hash, password, hashed_password)
+
+
+async def master_password_hash():
+    global MASTER_PASSWORD_HASH
+    if MASTER_PASSWORD_HASH is None:
+        if not MASTER_PASSWORD:
+            raise RuntimeError("Set MASTER_PASSWORD_HASH or MASTER_PASSWORD")
+        MASTER_PASSWORD_HASH = await hash_password(MASTER_PASSWORD)
+    return MASTER_PASSWORD_HASH
+
+
+if __name__ == "__main__":
+    from getpass import getpass
+
+    print(ph.hash(getpass("Master password: ")))
@@ -0,0 +1,32 @@
+from json import dumps as json_dumps
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson is optional: it renders list payloads several times faster than the
+# stdlib encoder, but everything works without it.
+FastJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+
+def dumps(content):
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json_dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def row_serializer(columns):
+    """Build a function turning result rows of ``columns`` into dicts.
+
+    Field names are resolved once here, so serializing a row is a single
+    ``dict(zip(...))`` with no per-row reflection. Plain strings name
+    computed columns.
+    """
+    fields = tuple(getattr(column, "key", column) for column in columns)
+
+    def serialize(row):
+        return dict(zip(fields, row))
+
+    return serialize
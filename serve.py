@@ -0,0 +1,153 @@
+# Production entry point: python -m serve [--workers N] [--preload] ...
+#
+# Without --preload, workers > 1 uses uvicorn's own supervisor, which starts
+# every worker as a fresh interpreter that imports the app by itself. With
+# --preload the app is imported once here, the listening socket is bound
+# once, and workers are forked from this process so they share the already
+# imported code copy-on-write and start almost instantly.
+import os
+import sys
+import signal
+from argparse import ArgumentParser
+from time import monotonic, sleep
+from uvicorn import Config, Server, run
+
+APP = "main:app"
+
+
+def default_workers():
+    return int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+
+
+def parse_args(argv=None):
+    parser = ArgumentParser(prog="python -m serve", description="Run the API with uvicorn.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="worker processes (default: WEB_CONCURRENCY or the number of CPU cores)")
+    parser.add_argument("--loop", choices=["auto", "uvloop", "asyncio"], default="auto",
+                        help="event loop; auto picks uvloop when it is installed")
+    parser.add_argument("--http", choices=["auto", "httptools", "h11"], default="auto",
+                        help="HTTP parser; auto picks httptools when it is installed")
+    parser.add_argument("--keep-alive", type=int, default=5,
+                        help="seconds an idle keep-alive connection stays open; behind a load "
+                             "balancer set it above the balancer's idle timeout")
+    parser.add_argument("--backlog", type=int, default=2048,
+                        help="pending connections the kernel queues before refusing new ones")
+    parser.add_argument("--graceful-timeout", type=int, default=30,
+                        help="seconds to let in-flight requests finish after SIGTERM")
+    parser.add_argument("--limit-concurrency", type=int, default=None,
+                        help="per-worker cap on open connections and tasks before answering 503")
+    parser.add_argument("--preload", action="store_true",
+                        help="import the app once and fork workers from it")
+    parser.add_argument("--reload", action="store_true",
+                        help="development only: restart on code changes, forces one worker")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-access-log", dest="access_log", action="store_false")
+    return parser.parse_args(argv)
+
+
+def server_options(args):
+    return {
+        "host": args.host,
+        "port": args.port,
+        "loop": args.loop,
+        "http": args.http,
+        "timeout_keep_alive": args.keep_alive,
+        "backlog": args.backlog,
+        "timeout_graceful_shutdown": args.graceful_timeout,
+        "limit_concurrency": args.limit_concurrency,
+        "log_level": args.log_level,
+        "access_log": args.access_log,
+    }
+
+
+def reap():
+    try:
+        return os.waitpid(-1, os.WNOHANG)
+    except ChildProcessError:
+        return 0, 0
+
+
+def serve_preforked(args):
+    from main import app
+
+    config = Config(app, **server_options(args))
+    sock = config.bind_socket()
+    children = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                Server(config).run(sockets=[sock])
+            finally:
+                os._exit(0)
+        children[pid] = monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(args.workers):
+        spawn()
+
+    # Poll rather than block in waitpid: a blocking wait is resumed after
+    # the signal handler runs, so a stop would go unnoticed until a worker
+    # happened to exit.
+    while children and not stopping:
+        pid, status = reap()
+        if not pid:
+            sleep(0.1)
+            continue
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        print(f"Worker {pid} exited with status {status}, restarting", file=sys.stderr)
+        # Don't spin if workers crash right after starting.
+        if monotonic() - started < 1:
+            sleep(1)
+        if not stopping:
+            spawn()
+
+    # Workers get the graceful timeout to drain, plus a little for their
+    # shutdown hooks; any still running after that are killed.
+    deadline = monotonic() + args.graceful_timeout + 5
+    while children and monotonic() < deadline:
+        pid, _ = reap()
+        if pid:
+            children.pop(pid, None)
+        else:
+            sleep(0.1)
+    for pid in children:
+        print(f"Worker {pid} did not stop in time, killing it", file=sys.stderr)
+        try:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        except (ProcessLookupError, ChildProcessError):
+            pass
+    sock.close()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.reload:
+        run(APP, reload=True, **server_options(args))
+    elif args.preload and args.workers > 1:
+        serve_preforked(args)
+    else:
+        run(APP, workers=args.workers, **server_options(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import re
+from os import getenv
+from collections import Counter
+from logging import getLogger
+from fastapi import Depends
+from instrumentation import RequestStats, request_stats, route_template
+
+# off (default), on: add a Server-Timing header and a log line per request,
+# strict: additionally raise QueryBudgetExceeded when a route runs more
+# queries than its declared budget, so test and smoke runs fail loudly.
+SQL_PROFILE = getenv("SQL_PROFILE", "off").lower()
+SQL_PROFILE_ENABLED = SQL_PROFILE in ("1", "true", "on", "strict")
+SQL_PROFILE_STRICT = SQL_PROFILE == "strict"
+
+logger = getLogger(__name__)
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\$\d+|\b\d+(?:\.\d+)?\b|%\(\w+\)s")
+PLACEHOLDER_LISTS = re.compile(r"\?(?:\s*,\s*\?)+")
+WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+def fingerprint(statement: str):
+    """Reduce a statement to its shape: literals and bound parameters become
+    ``?`` and expanded IN lists collapse, so one query run in a loop always
+    maps to the same fingerprint."""
+    statement = LITERALS.sub("?", statement)
+    statement = PLACEHOLDER_LISTS.sub("?", statement)
+    return WHITESPACE.sub(" ", statement).strip()
+
+
+def repeated_statements(statements: Counter):
+    fingerprints = Counter()
+    for statement, count in statements.items():
+        fingerprints[fingerprint(statement)] += count
+    return [(shape, count) for shape, count in fingerprints.most_common() if count > 1]
+
+
+def query_budget(limit: int):
+    """Route dependency declaring how many queries the route may run."""
+
+    async def declare_budget():
+        stats = request_stats.get()
+        if stats is not None:
+            stats.query_budget = limit
+
+    return Depends(declare_budget)
+
+
+def server_timing(stats: RequestStats, repeated: list):
+    description = f"{stats.queries} queries"
+    if repeated:
+        description += f", {len(repeated)} repeated"
+    return f'db;dur={stats.db_seconds * 1000:.1f};desc="{description}"'.encode()
+
+
+class QueryProfilerMiddleware:
+    """Report the SQL each request ran: a ``Server-Timing`` header with the
+    query count and DB time, and a log line listing statements that ran
+    more than once (the usual sign of an N+1 lazy load)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = None
+        stats = request_stats.get()
+        if stats is None:
+            stats = RequestStats()
+            token = request_stats.set(stats)
+        stats.statements = Counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                repeated = repeated_statements(stats.statements)
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"server-timing", server_timing(stats, repeated)),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            if token is not None:
+                request_stats.reset(token)
+        self.report(scope, stats)
+
+    def report(self, scope, stats: RequestStats):
+        route = route_template(scope)
+        repeated = repeated_statements(stats.statements)
+        over_budget = stats.query_budget is not None and stats.queries > stats.query_budget
+        budget = "-" if stats.query_budget is None else stats.query_budget
+        message = (
+            f"{scope['method']} {route} queries={stats.queries} budget={budget} "
+            f"db_ms={stats.db_seconds * 1000:.1f}"
+        )
+        for shape, count in repeated:
+            message += f"\n  {count}x {shape[:200]}"
+        if over_budget or repeated:
+            logger.warning(message)
+        else:
+            logger.info(message)
+        if over_budget and SQL_PROFILE_STRICT:
+            raise QueryBudgetExceeded(
+                f"{scope['method']} {route} ran {stats.queries} queries, budget is {stats.query_budget}"
+            )
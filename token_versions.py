@@ -0,0 +1,127 @@
+from os import getenv
+from time import time
+from asyncio import sleep
+from logging import getLogger
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from database import SessionLocal
+from models.users import TokenRevocation
+
+# session (default): the token only names the user, who is loaded on every
+# request. stateless: the token also carries the user id, admin flag and
+# token version, so authorization is a signature check plus a lookup in the
+# in-memory version map below.
+AUTH_TOKEN_MODE = getenv("AUTH_TOKEN_MODE", "session").lower()
+STATELESS_TOKENS = AUTH_TOKEN_MODE == "stateless"
+TOKEN_VERSION_REFRESH = float(getenv("TOKEN_VERSION_REFRESH", 5))
+
+# Rows committed slightly out of timestamp order are still picked up.
+REFRESH_OVERLAP = 60
+
+# Every token issued before a revocation has expired this long after it, so
+# older revocations can't reject anything and are not kept.
+REVOCATION_LIFETIME = int(getenv("COOKIE_DELTA")) * 60 + REFRESH_OVERLAP
+
+INSERTS = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+
+logger = getLogger(__name__)
+
+
+class TokenVersionMap:
+    """Per-worker copy of ``token_revocations``.
+
+    Only users whose tokens were revoked within the last token lifetime
+    have an entry, so the map is bounded by recent revocations rather than
+    by every user who ever logged out. A background task started from the
+    app's lifespan (``run``) refreshes it incrementally every
+    ``TOKEN_VERSION_REFRESH`` seconds, dropping entries that can no longer
+    reject a live token, so requests only ever read it. Revocations made
+    by this worker apply immediately, those made by other workers within
+    one interval.
+    """
+
+    def __init__(self, refresh_interval: float, lifetime: int):
+        self.refresh_interval = refresh_interval
+        self.lifetime = lifetime
+        self.versions = {}
+        self.revoked_at = {}
+        self.seen_until = None
+
+    def is_current(self, user_id: int, version: int):
+        return version >= self.versions.get(user_id, 0)
+
+    def record(self, user_id: int, version: int, revoked_at: float = None):
+        if version > self.versions.get(user_id, 0):
+            self.versions[user_id] = version
+            self.revoked_at[user_id] = revoked_at or time()
+
+    def prune(self, cutoff: float):
+        for user_id in [user_id for user_id, at in self.revoked_at.items() if at <= cutoff]:
+            del self.versions[user_id]
+            del self.revoked_at[user_id]
+
+    async def refresh(self):
+        cutoff = time() - self.lifetime
+        since = cutoff
+        if self.seen_until is not None:
+            since = max(cutoff, self.seen_until - REFRESH_OVERLAP)
+        query = select(
+            TokenRevocation.user_id, TokenRevocation.token_version, TokenRevocation.revoked_at
+        ).where(TokenRevocation.revoked_at > since)
+        async with SessionLocal() as db:
+            rows = (await db.execute(query)).all()
+        for user_id, version, revoked_at in rows:
+            self.record(user_id, version, revoked_at)
+            self.seen_until = max(self.seen_until or revoked_at, revoked_at)
+        self.prune(cutoff)
+
+    async def run(self):
+        """Refresh forever; start it as a task once the first ``refresh``
+        has loaded the map."""
+        while True:
+            await sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception:
+                # Keep serving from the last copy and try again next interval.
+                logger.exception("Token version refresh failed")
+
+
+token_versions = TokenVersionMap(TOKEN_VERSION_REFRESH, REVOCATION_LIFETIME)
+
+
+async def token_claims(db, user):
+    """Extra claims for a new access token of ``user``."""
+    if not STATELESS_TOKENS:
+        return {}
+    version = await db.scalar(
+        select(TokenRevocation.token_version).where(TokenRevocation.user_id == user.id)
+    )
+    return {"uid": user.id, "adm": bool(user.is_admin), "ver": version or 0}
+
+
+async def revoke_tokens(db, user_id: int):
+    """Invalidate every token issued to ``user_id`` so far.
+
+    Runs inside the caller's transaction; pass the returned version to
+    ``record_revocation`` once it is committed.
+    """
+    if not STATELESS_TOKENS:
+        return None
+    insert = INSERTS[db.bind.dialect.name]
+    statement = (
+        insert(TokenRevocation)
+        .values(user_id=user_id, token_version=1, revoked_at=time())
+        .on_conflict_do_update(
+            index_elements=[TokenRevocation.user_id],
+            set_={"token_version": TokenRevocation.token_version + 1, "revoked_at": time()},
+        )
+        .returning(TokenRevocation.token_version)
+    )
+    return await db.scalar(statement)
+
+
+def record_revocation(user_id: int, version: int):
+    if version is not None:
+        token_versions.record(user_id, version)
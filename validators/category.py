@@ -32,6 +32,18 @@ class CategoryIDRequest(BaseModel):
     category_id: int = Field(gt=0, example=1)
 
 
+class CategoryResponse(BaseModel):
+    id: int
+    name: str
+
+
+class CategoryListResponse(BaseModel):
+    categories: list[CategoryResponse]
+
+
+class CategoryDetailResponse(BaseModel):
+    category: CategoryResponse
+
 
 
 
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import Annotated, Optional
 from fastapi import Form
 from fastapi import Depends
@@ -180,6 +180,137 @@ class FilteringRequest(BaseModel):
         }
     }
 
+class SearchRequest(BaseModel):
+    q: str = Field(min_length=1, max_length=100, example="cotton shirt")
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "q": "cotton shirt",
+            }
+        }
+    }
+
+
+DEFAULT_PRICE_BANDS = "10,20,50,100"
+MAX_PRICE_BANDS = 20
+
+
+class FacetsRequest(BaseModel):
+    price_bands: str = Field(
+        default=DEFAULT_PRICE_BANDS,
+        max_length=200,
+        pattern=r"^\d+(\.\d+)?(,\d+(\.\d+)?)*$",
+        example="10,20,50,100",
+        description="Ascending price boundaries separating the price facet buckets",
+    )
+
+    def bands(self):
+        return [float(band) for band in self.price_bands.split(",")]
+
+
+MAX_BULK_IDS = 10000
+
+
+class BulkProductSelection(BaseModel):
+    ids: Optional[list[int]] = Field(
+        default=None,
+        min_length=1,
+        max_length=MAX_BULK_IDS,
+        example=[1, 2, 3],
+        description="Products to change; mutually exclusive with filter",
+    )
+    filter: Optional[FilteringRequest] = Field(
+        default=None,
+        description="Change every product matching these filters; mutually exclusive with ids",
+    )
+
+    @model_validator(mode="after")
+    def validate_selection(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Provide either ids or filter")
+        return self
+
+
+class BulkIsActiveRequest(BulkProductSelection):
+    is_active: bool = Field(..., example=False)
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "filter": {"category": "T-Shirts"},
+                "is_active": False,
+            }
+        }
+    }
+
+
+class PriceChangeModeEnum(str, Enum):
+    absolute = "absolute"
+    percentage = "percentage"
+
+
+class BulkPriceRequest(BulkProductSelection):
+    mode: PriceChangeModeEnum = Field(..., example="percentage")
+    value: float = Field(
+        ...,
+        example=-10,
+        description="New price for absolute mode, or percentage change (e.g. -10 for 10% off)",
+    )
+
+    @model_validator(mode="after")
+    def validate_value(self):
+        if self.mode == PriceChangeModeEnum.absolute and self.value <= 0:
+            raise ValueError("Price must be greater than 0")
+        if self.mode == PriceChangeModeEnum.percentage and self.value <= -100:
+            raise ValueError("Percentage change must be greater than -100")
+        return self
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "ids": [1, 2, 3],
+                "mode": "percentage",
+                "value": -10,
+            }
+        }
+    }
+
+
+class ExportFormatEnum(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class ExportRequest(BaseModel):
+    format: ExportFormatEnum = Field(default=ExportFormatEnum.ndjson, example="ndjson")
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "format": "csv",
+            }
+        }
+    }
+
+
+MAX_PAGE_SIZE = 100
+
+
+class PaginationRequest(BaseModel):
+    cursor: Optional[str] = Field(default=None, max_length=512, example=None)
+    limit: int = Field(default=10, gt=0, le=MAX_PAGE_SIZE, example=10)
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "cursor": None,
+                "limit": 10,
+            }
+        }
+    }
+
+
 class UpdateIsActiveRequest(BaseModel):
     is_active: bool = Field(..., example=True)
 
@@ -192,9 +323,43 @@ class UpdateIsActiveRequest(BaseModel):
     }
     
 
+class ProductResponse(BaseModel):
+    id: int
+    name: str
+    description: Optional[str]
+    price: float
+    size: Optional[str]
+    category_id: Optional[int]
+    image_url: Optional[str]
+    is_active: Optional[bool]
+    category_name: Optional[str]
+
+
+class ProductListResponse(BaseModel):
+    products: list[ProductResponse]
+    next_cursor: Optional[str]
+
+
+class ProductSearchResult(ProductResponse):
+    rank: float
+
+
+class ProductSearchResponse(BaseModel):
+    products: list[ProductSearchResult]
+    next_cursor: Optional[str]
+
+
+class ProductDetailResponse(BaseModel):
+    product: ProductResponse
+
+
 is_active_dependency = Annotated[UpdateIsActiveRequest, Depends()]
 sorting_dependency = Annotated[SortingRequest, Depends()]
 filtering_dependency = Annotated[FilteringRequest, Depends()]
+pagination_dependency = Annotated[PaginationRequest, Depends()]
+export_dependency = Annotated[ExportRequest, Depends()]
+search_dependency = Annotated[SearchRequest, Depends()]
+facets_dependency = Annotated[FacetsRequest, Depends()]
 get_id_dependency = Annotated[ProductIDRequest, Depends()]
 create_product_dependency = Annotated[CreateProductRequest, Form()]
 update_product_dependency = Annotated[UpdateProductRequest, Form()]